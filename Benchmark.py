@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import Duration
+import Queues
+import Util_Jason
+from Index import SearchSession
+from Library import MusicLibrary
+from Sorting import SORT_ATTRIBUTES, merge_sort
+from Track import Track
+
+# Library shapes for each named scale
+SCALES = {
+    "1k": {"tracks": 1_000, "playlists": 20, "playlist_size": 50},
+    "100k": {"tracks": 100_000, "playlists": 200, "playlist_size": 500},
+    "1m": {"tracks": 1_000_000, "playlists": 1_000, "playlist_size": 1_000},
+}
+
+WORDS = ["love", "night", "summer", "heart", "fire", "blue", "dream", "gold", "rain", "city",
+         "light", "wild", "young", "home", "dance", "river", "star", "ghost", "honey", "paper"]
+
+# Results slower than the baseline by more than this factor are flagged
+REGRESSION_RATIO = 1.2
+
+def generate_library(tracks, playlists, playlist_size, artists=None, skew=1.1, seed=0):
+    """
+    Seeded synthetic library in the Storage.json shape. Artists follow a
+    Zipf-like curve (weight 1 / rank**skew), so a few artists own many
+    tracks as in a real collection; skew=0 spreads them evenly. Playlists
+    pick tracks uniformly at random.
+    """
+    rng = random.Random(seed)
+    artists = artists or max(1, tracks // 10)
+    names = [f"Artist {i}" for i in range(artists)]
+    weights = list(itertools.accumulate(1 / rank ** skew for rank in range(1, artists + 1)))
+    picked = rng.choices(names, cum_weights=weights, k=tracks)
+    albums = max(1, tracks // 12)
+
+    data = {"Tracks": [], "Playlists": [], "NextTrackId": tracks + 1}
+    for track_id, artist in enumerate(picked, start=1):
+        featured = rng.choice(names) if rng.random() < 0.1 else ""
+        data["Tracks"].append(Track(
+            track_id,
+            f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {track_id}",
+            artist,
+            f"Album {rng.randrange(albums)}",
+            str(rng.randint(60, 600)),
+            featured))
+    for number in range(playlists):
+        data["Playlists"].append({f"Playlist {number}": [rng.randint(1, tracks) for _ in range(playlist_size)]})
+    return data
+
+def measure(name, run, setup=None, repeat=3, ops=1):
+    """
+    Time run() `repeat` times; setup(), if given, builds a fresh argument
+    for each run outside the timed section. Reports best and median seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state) if setup else run()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {"name": name, "ops": ops, "best": best, "median": statistics.median(times),
+            "per_op": best / ops}
+
+def _fresh_store(data):
+    Util_Jason.invalidate()
+    Util_Jason.save(data)
+    return data
+
+def run_scale(label, config, repeat=3, seed=0, steps=1000):
+    """Run every benchmark on one synthetic library; returns a list of results"""
+    results = []
+    add = lambda result: results.append(dict(result, scale=label))
+    rng = random.Random(seed)
+
+    data = {}
+    add(measure("generate", lambda: data.update(generate_library(seed=seed, **config)), repeat=1))
+
+    # ---------- Storage ----------
+    add(measure("save", lambda: _fresh_store(data), repeat=repeat))
+
+    def load_ready():
+        Util_Jason.invalidate()
+        Util_Jason.load()
+    def load_all():
+        load_ready()
+        Util_Jason.wait_for_playlists()
+    add(measure("load (tracks ready)", load_ready, repeat=repeat))
+    Util_Jason.wait_for_playlists()
+    add(measure("load", load_all, repeat=repeat))
+    data = Util_Jason.load()
+    index = Util_Jason.get_index(data)
+
+    # ---------- Sorting ----------
+    for key in SORT_ATTRIBUTES:
+        add(measure(f"merge_sort[{key}]", lambda: merge_sort(data["Tracks"], key), repeat=repeat))
+
+    # ---------- Search ----------
+    sample = rng.sample(data["Tracks"], min(50, len(data["Tracks"])))
+    queries = [f"{track['title'].split()[0][:3]} {track['artist'].split()[-1]}" for track in sample]
+    typos = [track["title"].split()[0][:-1] + "x" for track in sample[:20]]
+    index.search(queries[0])
+    index.fuzzy_search(typos[0])
+    for mode in ("tokens", "substring"):
+        add(measure(f"searchTrack[{mode}]",
+                    lambda session: [session.search(query) for query in queries],
+                    setup=lambda: SearchSession(index, mode), repeat=repeat, ops=len(queries)))
+    add(measure("searchTrack[fuzzy]", lambda: [index.fuzzy_search(query) for query in typos],
+                repeat=repeat, ops=len(typos)))
+
+    # ---------- Duration column ----------
+    durations = index.duration_column()
+    members = next(iter(data["Playlists"][0].values()), []) if data["Playlists"] else []
+    add(measure("durations.total", durations.total, repeat=repeat))
+    add(measure("durations.minimum/maximum", lambda: (durations.minimum(), durations.maximum()), repeat=repeat))
+    add(measure("durations.total_between", lambda: durations.total_between(180, 300), repeat=repeat))
+    add(measure("durations.histogram", durations.histogram, repeat=repeat))
+    add(measure("durations.total[playlist]", lambda: durations.total(members), repeat=repeat))
+
+    # ---------- Duplicate check ----------
+    library = MusicLibrary()
+    probes = [(track["title"], track["artist"]) for track in sample]
+    probes += [(f"Missing {i}", "Nobody") for i in range(len(probes))]
+    add(measure("_track_exists", lambda: [library._track_exists(*probe) for probe in probes],
+                repeat=repeat, ops=len(probes)))
+
+    # ---------- Delete cascade (track + every playlist reference + save) ----------
+    deletes = 5
+    def pick_victims():
+        return rng.sample(data["Tracks"], min(deletes, len(data["Tracks"]) - 1))
+    add(measure("deleteTrack cascade", lambda victims: [library.removeTrack(track) for track in victims],
+                setup=pick_victims, repeat=repeat, ops=deletes))
+
+    # ---------- Queue ----------
+    tracks = list(data["Tracks"])
+    for engine in (Queues.Queue, Queues.ArrayQueue):
+        def empty_queue():
+            return engine(seed=seed)
+        def enqueue(queue):
+            queue.enqueue_playlist(tracks)
+            queue.writer.discard()
+        add(measure(f"enqueue_playlist[{engine.__name__}]", enqueue, setup=empty_queue,
+                    repeat=repeat, ops=len(tracks)))
+
+        for shuffle, repeat_mode in itertools.product((False, True), repeat=2):
+            count = min(steps, len(tracks) - 1)
+            def full_queue():
+                queue = engine(seed=seed)
+                queue.enqueue_playlist(tracks)
+                queue.shuffle_, queue.repeat_ = shuffle, repeat_mode
+                return queue
+            def play(queue):
+                for _ in range(count):
+                    queue.next()
+                queue.writer.discard()
+            name = f"next[{engine.__name__}, shuffle={'on' if shuffle else 'off'}, repeat={'on' if repeat_mode else 'off'}]"
+            add(measure(name, play, setup=full_queue, repeat=repeat, ops=count))
+    return results
+
+def run(scales, repeat=3, seed=0, steps=1000):
+    """Run the suite for each scale in a scratch directory; returns the report dict"""
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "storage_mode": Util_Jason.STORAGE_MODE,
+            "numpy": Duration.numpy is not None,
+            "seed": seed,
+            "repeat": repeat,
+            "steps": steps,
+            "scales": {label: SCALES[label] for label in scales},
+        },
+        "results": [],
+    }
+    home = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="music-bench-") as scratch:
+        os.chdir(scratch)
+        try:
+            for label in scales:
+                print(f"Running {label} ({SCALES[label]['tracks']:,} tracks)...", file=sys.stderr)
+                # The app prints status messages; keep them out of the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report["results"] += run_scale(label, SCALES[label], repeat, seed, steps)
+                Util_Jason.invalidate()
+                if Util_Jason.STORAGE_MODE == "sqlite":
+                    import Util_Sqlite
+                    Util_Sqlite.close()
+                    os.remove(Util_Sqlite.DB_FILE)
+        finally:
+            os.chdir(home)
+    return report
+
+def compare(report, baseline):
+    """Ratio of each best time to the baseline's; above REGRESSION_RATIO is a regression"""
+    before = {(r["scale"], r["name"]): r["best"] for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        old = before.get((result["scale"], result["name"]))
+        if old:
+            ratio = result["best"] / old
+            rows.append({"scale": result["scale"], "name": result["name"], "ratio": ratio,
+                         "regression": ratio > REGRESSION_RATIO})
+    return rows
+
+def print_report(report, comparison=None):
+    ratios = {(row["scale"], row["name"]): row for row in comparison or []}
+    print(f"{'scale':<6} {'benchmark':<46} {'best (s)':>10} {'per op (µs)':>12}")
+    for result in report["results"]:
+        line = (f"{result['scale']:<6} {result['name']:<46} {result['best']:>10.4f} "
+                f"{result['per_op'] * 1e6:>12.2f}")
+        row = ratios.get((result["scale"], result["name"]))
+        if row:
+            line += f"  x{row['ratio']:.2f}{'  REGRESSION' if row['regression'] else ''}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the music library on synthetic data.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["1k"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=1000, help="Queue.next calls per run")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args.scale, args.repeat, args.seed, args.steps)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            comparison = compare(report, json.load(file))
+        report["comparison"] = comparison
+    print_report(report, comparison)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        print(f"\nResults written to {args.output}.")
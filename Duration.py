@@ -1,3 +1,11 @@
+from array import array
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def normalize_duration(duration):
     
     #Convert any duration format to seconds (int).
@@ -150,3 +158,94 @@ def min_to_sec(duration_str):
         return minutes * 60 + seconds
     except ValueError:
         return 0
+
+
+class DurationColumn:
+    """
+    Track durations in seconds, one unsigned int per track in a flat array,
+    with a map from track ID to its slot. Deleting swaps the last entry into
+    the gap, so add and remove are O(1). Totals, extremes, histograms and
+    filtered sums run as single NumPy operations over a zero-copy view of
+    the array when NumPy is installed. Without it, totals and extremes use
+    the sum/min/max builtins directly on the array, while filtered sums and
+    histograms are plain Python loops.
+    """
+    def __init__(self, tracks=()):
+        self.seconds = array('I')
+        self.ids = []
+        self.slot = {}
+        for track in tracks:
+            self.add(track)
+
+    def __len__(self):
+        return len(self.seconds)
+
+    def add(self, track):
+        if track["id"] in self.slot:
+            return
+        self.slot[track["id"]] = len(self.seconds)
+        self.ids.append(track["id"])
+        self.seconds.append(normalize_duration(track.get("duration", 0)))
+
+    def remove(self, track_id):
+        slot = self.slot.pop(track_id, None)
+        if slot is None:
+            return
+        last_id = self.ids.pop()
+        last = self.seconds.pop()
+        if slot < len(self.seconds):
+            self.ids[slot] = last_id
+            self.seconds[slot] = last
+            self.slot[last_id] = slot
+
+    def vector(self, track_ids=None):
+        """
+        Durations of the whole library, or of track_ids (repeats count
+        again, unknown IDs are skipped), as a NumPy array or an array('I').
+        Use it and drop it: the NumPy view pins the array's buffer.
+        """
+        if track_ids is None:
+            if numpy is None:
+                return self.seconds
+            return numpy.frombuffer(self.seconds, dtype=numpy.uintc) if self.seconds else numpy.zeros(0, numpy.uintc)
+        slots = [self.slot[track_id] for track_id in track_ids if track_id in self.slot]
+        if numpy is None:
+            return array('I', map(self.seconds.__getitem__, slots))
+        return self.vector()[numpy.array(slots, dtype=numpy.intp)]
+
+    def total(self, track_ids=None):
+        """Total seconds"""
+        values = self.vector(track_ids)
+        return int(values.sum(dtype=numpy.uint64)) if numpy is not None else sum(values)
+
+    def minimum(self, track_ids=None):
+        values = self.vector(track_ids)
+        if not len(values):
+            return 0
+        return int(values.min()) if numpy is not None else min(values)
+
+    def maximum(self, track_ids=None):
+        values = self.vector(track_ids)
+        if not len(values):
+            return 0
+        return int(values.max()) if numpy is not None else max(values)
+
+    def total_between(self, low, high, track_ids=None):
+        """Total seconds of the tracks with low <= duration < high"""
+        values = self.vector(track_ids)
+        if numpy is not None:
+            return int(values[(values >= low) & (values < high)].sum(dtype=numpy.uint64))
+        return sum(value for value in values if low <= value < high)
+
+    def histogram(self, bucket=60, track_ids=None):
+        """
+        Track counts per duration bucket of `bucket` seconds:
+        counts[i] tracks last from i*bucket up to (i+1)*bucket seconds.
+        """
+        values = self.vector(track_ids)
+        if not len(values):
+            return []
+        if numpy is not None:
+            return numpy.bincount(values // bucket).tolist()
+        counts = Counter(value // bucket for value in values)
+        return [counts[i] for i in range(max(counts) + 1)]
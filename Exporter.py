@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import sys
+from Duration import normalize_duration
+from Util_Jason import load, get_index, wait_for_playlists
+
+COLUMNS = ["id", "title", "artist", "featured_artist", "album", "duration"]
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".m3u": "m3u", ".m3u8": "m3u"}
+
+def library_tracks(data=None):
+    """Every library track, straight from the store"""
+    data = data if data is not None else load()
+    yield from data.get("Tracks", [])
+
+def playlist_tracks(name, data=None):
+    """A playlist's tracks in playlist order, looked up one ID at a time"""
+    wait_for_playlists()
+    data = data if data is not None else load()
+    by_id = get_index(data).by_id
+    for playlist in data.get("Playlists", []):
+        if name in playlist:
+            for track_id in playlist[name]:
+                if track_id in by_id:
+                    yield by_id[track_id]
+            return
+
+def _row(track):
+    return {column: track.get(column, "") for column in COLUMNS}
+
+def jsonl_lines(tracks):
+    """One JSON object per track, in the Storage.json track shape"""
+    for track in tracks:
+        row = _row(track)
+        row["duration"] = str(row["duration"])
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+def m3u_lines(tracks, name=None, extended=True):
+    """
+    M3U playlist lines. Tracks carry no file paths, so each entry is named
+    "Artist - Title" for a player or script to resolve. Extended M3U adds
+    #EXTINF with the duration in seconds.
+    """
+    if extended:
+        yield "#EXTM3U\n"
+        if name:
+            yield f"#PLAYLIST:{name}\n"
+    for track in tracks:
+        label = f"{track['artist']} - {track['title']}"
+        if extended:
+            yield f"#EXTINF:{normalize_duration(track.get('duration', 0))},{label}\n"
+        yield f"{label}\n"
+
+def write_csv(tracks, file):
+    """Write tracks to an open text file as CSV with a header row"""
+    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+    writer.writeheader()
+    for track in tracks:
+        writer.writerow(_row(track))
+
+def export_tracks(tracks, path, name=None):
+    """
+    Stream tracks to path in the format given by its extension (.jsonl,
+    .csv, .m3u or .m3u8). Nothing is collected first, so memory use does
+    not grow with the library. Returns False if the format is unknown or
+    the file cannot be written.
+    """
+    kind = FORMATS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        print(f"Unsupported export format for {path}. Use .jsonl, .csv, .m3u or .m3u8.")
+        return False
+
+    temp_name = f"{path}.tmp"
+    try:
+        with open(temp_name, 'w', encoding='utf-8', newline='') as file:
+            if kind == "jsonl":
+                file.writelines(jsonl_lines(tracks))
+            elif kind == "csv":
+                write_csv(tracks, file)
+            else:
+                file.writelines(m3u_lines(tracks, name))
+        os.replace(temp_name, path)
+        return True
+    except OSError as e:
+        print(f"Error writing {path}: {e}")
+        return False
+
+def export_library(path, data=None):
+    return export_tracks(library_tracks(data), path)
+
+def export_playlist(name, path, data=None):
+    wait_for_playlists()
+    data = data if data is not None else load()
+    if name not in get_index(data).playlist_ids:
+        print(f"Playlist '{name}' not found.")
+        return False
+    return export_tracks(playlist_tracks(name, data), path, name=name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        export_library(sys.argv[1])
+    elif len(sys.argv) == 3:
+        export_playlist(sys.argv[1], sys.argv[2])
+    else:
+        print("Usage: python Exporter.py [playlist name] <out.jsonl | out.csv | out.m3u>")
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+import sys
+import time
+from Duration import checkformat
+from Index import track_key
+from Track import Track
+from Util_Jason import load, save, next_track_id, get_index
+
+BATCH_SIZE = 5000
+
+def read_rows(path):
+    """
+    Stream track rows from a CSV (with a header row) or JSON Lines file,
+    one dict at a time, so files of any size can be read. A JSON line that
+    does not hold an object yields None.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if extension == ".csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = None
+                yield row if isinstance(row, dict) else None
+
+def _text(row, field):
+    """A row field as stripped text; JSON Lines values need not be strings"""
+    value = row.get(field)
+    if isinstance(value, (list, dict)):
+        raise TypeError(f"{field} must be text or a number")
+    return "" if value is None else str(value).strip()
+
+def _commit(data, batch):
+    """Add one batch to the library with a single save"""
+    data["Tracks"].extend(batch)
+    save(data, {"op": "add_tracks", "tracks": batch})
+
+def import_tracks(path, batch_size=BATCH_SIZE):
+    """
+    Bulk-add tracks from a CSV or JSON Lines file with title, artist,
+    featured_artist, album and duration columns. Rows with a missing title
+    or artist or a bad duration are skipped, as are tracks already in the
+    library (or earlier in the file). New tracks get fresh IDs and are saved
+    batch_size at a time. Returns a summary dict, or None if the file
+    cannot be read.
+    """
+    if not os.path.exists(path):
+        print(f"File {path} not found.")
+        return None
+
+    data = load()
+    index = get_index(data)
+    seen = set()
+    batch = []
+    summary = {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+    started = time.perf_counter()
+
+    try:
+        for row in read_rows(path):
+            summary["rows"] += 1
+            if row is None:
+                summary["invalid"] += 1
+                continue
+
+            try:
+                title = _text(row, "title")
+                artist = _text(row, "artist")
+                duration = checkformat(_text(row, "duration"))
+                if not title or not artist or duration == "invalid":
+                    summary["invalid"] += 1
+                    continue
+                track = Track(None, title, artist, _text(row, "album"), duration,
+                              _text(row, "featured_artist"))
+            except (ValueError, TypeError):
+                summary["invalid"] += 1
+                continue
+
+            key = track_key(title, artist)
+            if key in seen or index.has_track(title, artist):
+                summary["duplicates"] += 1
+                continue
+            seen.add(key)
+
+            track.id = next_track_id(data)
+            batch.append(track)
+            if len(batch) >= batch_size:
+                _commit(data, batch)
+                summary["imported"] += len(batch)
+                batch = []
+                elapsed = time.perf_counter() - started
+                print(f"  {summary['imported']} track(s) imported ({summary['rows'] / elapsed:,.0f} rows/sec)")
+
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"Error reading {path}: {e}")
+
+    # Whatever was read before an error is still kept
+    if batch:
+        _commit(data, batch)
+        summary["imported"] += len(batch)
+
+    summary["seconds"] = time.perf_counter() - started
+    summary["rows_per_sec"] = summary["rows"] / summary["seconds"] if summary["seconds"] else 0.0
+    print(f"Imported {summary['imported']} of {summary['rows']} row(s) "
+          f"({summary['duplicates']} duplicate(s), {summary['invalid']} invalid) "
+          f"in {summary['seconds']:.2f}s, {summary['rows_per_sec']:,.0f} rows/sec.")
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python Importer.py <tracks.csv | tracks.jsonl>")
+    else:
+        import_tracks(sys.argv[1])
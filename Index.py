@@ -0,0 +1,492 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, defaultdict
+from Duration import DurationColumn, normalize_duration
+from Sorting import merge_sort, sort_key
+
+
+def track_key(title, artist):
+    """Normalized (title, artist) pair used for duplicate detection"""
+    return ((title or "").lower().strip(), (artist or "").lower().strip())
+
+
+def _key_of(track):
+    return track_key(track.get("title"), track.get("artist"))
+
+
+class SortedView:
+    """
+    Tracks kept in merge_sort(tracks, key) order, with a parallel list of
+    collation keys so inserts and removals are a binary search away.
+    """
+
+    def __init__(self, tracks, key):
+        self.collate = sort_key(key)
+        self.tracks = merge_sort(tracks, key)
+        self.keys = [self.collate(track) for track in self.tracks]
+
+    def insert(self, track):
+        k = self.collate(track)
+        position = bisect_right(self.keys, k)
+        self.keys.insert(position, k)
+        self.tracks.insert(position, track)
+
+    def total(self):
+        return len(self.tracks)
+
+    def after(self, cursor, count):
+        """Up to count (key, track) rows sorting after cursor (None = from the start)"""
+        start = 0 if cursor is None else bisect_right(self.keys, cursor)
+        return list(zip(self.keys[start:start + count], self.tracks[start:start + count]))
+
+    def before(self, cursor, count):
+        """Up to count (key, track) rows sorting before cursor"""
+        end = bisect_left(self.keys, cursor)
+        start = max(0, end - count)
+        return list(zip(self.keys[start:end], self.tracks[start:end]))
+
+    def remove(self, track):
+        k = self.collate(track)
+        position = bisect_left(self.keys, k)
+        while position < len(self.keys) and self.keys[position] == k:
+            if self.tracks[position] == track:
+                del self.keys[position]
+                del self.tracks[position]
+                return
+            position += 1
+
+
+SEARCH_FIELDS = ("title", "artist", "featured_artist", "album")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a string"""
+    return _TOKEN.findall((text or "").lower())
+
+
+class TokenIndex:
+    """
+    Inverted index from word tokens of SEARCH_FIELDS to track IDs.
+    A sorted vocabulary lets each query token match every indexed token it
+    is a prefix of with two binary searches.
+    """
+
+    def __init__(self, tracks):
+        self.postings = defaultdict(set)
+        for track in tracks:
+            for token in self._tokens(track):
+                self.postings[token].add(track["id"])
+        self.vocabulary = sorted(self.postings)
+
+    @staticmethod
+    def _tokens(track):
+        tokens = set()
+        for field in SEARCH_FIELDS:
+            tokens.update(tokenize(track.get(field)))
+        return tokens
+
+    def add(self, track):
+        for token in self._tokens(track):
+            if token not in self.postings:
+                insort(self.vocabulary, token)
+            self.postings[token].add(track["id"])
+
+    def remove(self, track):
+        for token in self._tokens(track):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(track["id"])
+            if not ids:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def _prefix_matches(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + "\U0010ffff", start)
+        matches = set()
+        for token in self.vocabulary[start:end]:
+            matches |= self.postings[token]
+        return matches
+
+    def search(self, query):
+        """IDs of tracks where every query token prefixes some indexed token"""
+        result = None
+        for token in sorted(set(tokenize(query)), key=len, reverse=True):
+            matches = self._prefix_matches(token)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result or set()
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space"""
+    grams = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(first, second):
+    """Jaccard similarity of two trigram sets"""
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+class TrigramIndex:
+    """
+    Trigram postings over SEARCH_FIELDS for typo-tolerant search.
+    Candidates are the tracks sharing enough trigrams with the query, so
+    only they are scored instead of every track in the library.
+    """
+
+    def __init__(self, tracks):
+        self.postings = defaultdict(set)
+        for track in tracks:
+            self.add(track)
+
+    @staticmethod
+    def _grams(track):
+        grams = set()
+        for field in SEARCH_FIELDS:
+            grams |= trigrams(track.get(field))
+        return grams
+
+    def add(self, track):
+        for gram in self._grams(track):
+            self.postings[gram].add(track["id"])
+
+    def remove(self, track):
+        for gram in self._grams(track):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(track["id"])
+                if not ids:
+                    del self.postings[gram]
+
+    def candidates(self, query, min_shared=0.3):
+        """IDs sharing at least min_shared of the query's trigrams"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return set()
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self.postings.get(gram, ()))
+        needed = max(1, int(len(query_grams) * min_shared))
+        return {track_id for track_id, count in counts.items() if count >= needed}
+
+
+def fuzzy_score(query, track):
+    """Best similarity between the query and a whole field or any single word of it"""
+    query_grams = trigrams(query)
+    best = 0.0
+    for field in SEARCH_FIELDS:
+        value = track.get(field)
+        if not value:
+            continue
+        best = max(best, similarity(query_grams, trigrams(value)))
+        for word in tokenize(value):
+            best = max(best, similarity(query_grams, trigrams(word)))
+    return best
+
+
+# Batches larger than this drop the sorted views and search indexes instead
+# of updating them; they are rebuilt on next use
+REBUILD_AFTER = 256
+
+# Operations that add or remove library tracks; these bump LibraryIndex.version
+TRACK_OPS = ("add_track", "add_tracks", "delete_track")
+
+
+class Aggregate:
+    """Running totals for a set of tracks: count, seconds and tracks per artist"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+        self.artists = Counter()
+
+    def add(self, track):
+        self.count += 1
+        self.seconds += normalize_duration(track.get("duration", 0))
+        self.artists[track.get("artist", "")] += 1
+
+    def remove(self, track):
+        self.count -= 1
+        self.seconds -= normalize_duration(track.get("duration", 0))
+        artist = track.get("artist", "")
+        self.artists[artist] -= 1
+        if self.artists[artist] <= 0:
+            del self.artists[artist]
+
+
+class LibraryIndex:
+    """
+    In-memory lookup structures for the shared data store.
+    Built once per load and kept in step by apply(), which receives the same
+    operation records that Util_Jason.save() persists.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.version = 0
+        self.views = {}
+        self.tokens = None
+        self.trigrams = None
+        self.durations = None
+        self.by_id = {}
+        self.keys = Counter()
+        self.stats = Aggregate()
+        for track in data.get("Tracks", []):
+            self.by_id.setdefault(track.get("id"), track)
+            self.keys[_key_of(track)] += 1
+            self.stats.add(track)
+
+        # Per playlist: the member IDs, their normalized keys and running totals
+        self.playlist_ids = {}
+        self.playlist_keys = {}
+        self.playlist_stats = {}
+        for playlist in data.get("Playlists", []):
+            for name, track_ids in playlist.items():
+                self._new_playlist(name)
+                self._add_members(name, track_ids)
+
+    def _new_playlist(self, name):
+        self.playlist_ids[name] = Counter()
+        self.playlist_keys[name] = Counter()
+        self.playlist_stats[name] = Aggregate()
+
+    def _add_members(self, name, track_ids):
+        for track_id in track_ids:
+            self.playlist_ids[name][track_id] += 1
+            track = self.by_id.get(track_id)
+            if track is not None:
+                self.playlist_keys[name][_key_of(track)] += 1
+                self.playlist_stats[name].add(track)
+
+    def _remove_member(self, name, track_id):
+        ids = self.playlist_ids[name]
+        if not ids[track_id]:
+            return
+        ids[track_id] -= 1
+        if not ids[track_id]:
+            del ids[track_id]
+        track = self.by_id.get(track_id)
+        if track is not None:
+            self.playlist_stats[name].remove(track)
+            keys = self.playlist_keys[name]
+            key = _key_of(track)
+            keys[key] -= 1
+            if keys[key] <= 0:
+                del keys[key]
+
+    def get(self, track_id):
+        """Return the track with this id, or None"""
+        return self.by_id.get(track_id)
+
+    def __contains__(self, track_id):
+        return track_id in self.by_id
+
+    def search_ids(self, query):
+        """Like search(), but only the matching track IDs"""
+        return [track["id"] for track in self.search(query)]
+
+    def sorted_tracks(self, key="title"):
+        """
+        Library tracks in merge_sort order for key. The view is sorted once
+        and then maintained on create/delete; treat the list as read-only.
+        """
+        if key not in self.views:
+            self.views[key] = SortedView(self.data.get("Tracks", []), key)
+        return self.views[key].tracks
+
+    def sorted_view(self, key="title"):
+        """The SortedView behind sorted_tracks(key), usable as a cursor source"""
+        self.sorted_tracks(key)
+        return self.views[key]
+
+    def duration_column(self):
+        """Library durations as a DurationColumn, built on first use"""
+        if self.durations is None:
+            self.durations = DurationColumn(self.data.get("Tracks", []))
+        return self.durations
+
+    def search(self, query):
+        """Tracks matching query through the token index, in ID order"""
+        if self.tokens is None:
+            self.tokens = TokenIndex(self.data.get("Tracks", []))
+        return [self.by_id[track_id] for track_id in sorted(self.tokens.search(query))
+                if track_id in self.by_id]
+
+    def fuzzy_search(self, query, threshold=0.3):
+        """Typo-tolerant search: tracks ranked by trigram similarity to query"""
+        if self.trigrams is None:
+            self.trigrams = TrigramIndex(self.data.get("Tracks", []))
+        scored = []
+        for track_id in self.trigrams.candidates(query):
+            track = self.by_id.get(track_id)
+            if track is None:
+                continue
+            score = fuzzy_score(query, track)
+            if score >= threshold:
+                scored.append((-score, track_id, track))
+        scored.sort(key=lambda item: item[:2])
+        return [track for _, _, track in scored]
+
+    def has_track(self, title, artist):
+        """True if the library already holds this title/artist pair"""
+        return self.keys[track_key(title, artist)] > 0
+
+    def playlist_has(self, name, track):
+        """True if the playlist holds this track or another with the same title/artist"""
+        if name not in self.playlist_ids:
+            return False
+        return (self.playlist_ids[name][track["id"]] > 0 or
+                self.playlist_keys[name][_key_of(track)] > 0)
+
+    def _add_track(self, track):
+        self.by_id.setdefault(track["id"], track)
+        self.keys[_key_of(track)] += 1
+        self.stats.add(track)
+        for view in self.views.values():
+            view.insert(track)
+        if self.tokens is not None:
+            self.tokens.add(track)
+        if self.trigrams is not None:
+            self.trigrams.add(track)
+        if self.durations is not None:
+            self.durations.add(track)
+
+    def apply(self, op):
+        """Update the index for one operation record"""
+        kind = op.get("op")
+        if kind in TRACK_OPS:
+            # Only a change to the track set can change search results
+            self.version += 1
+
+        if kind == "add_track":
+            self._add_track(op["track"])
+
+        elif kind == "add_tracks":
+            # A large batch is cheaper to re-sort and re-index on next use
+            # than to insert into each structure one track at a time
+            if len(op["tracks"]) > REBUILD_AFTER:
+                self.views = {}
+                self.tokens = None
+                self.trigrams = None
+            for track in op["tracks"]:
+                self._add_track(track)
+
+        elif kind == "delete_track":
+            track = op["track"]
+            for view in self.views.values():
+                view.remove(track)
+            if self.tokens is not None:
+                self.tokens.remove(track)
+            if self.trigrams is not None:
+                self.trigrams.remove(track)
+            for name, ids in self.playlist_ids.items():
+                while ids[track["id"]]:
+                    self._remove_member(name, track["id"])
+            if self.by_id.get(track["id"]) == track:
+                del self.by_id[track["id"]]
+                if self.durations is not None:
+                    self.durations.remove(track["id"])
+            key = _key_of(track)
+            self.keys[key] -= 1
+            if self.keys[key] <= 0:
+                del self.keys[key]
+            self.stats.remove(track)
+
+        elif kind == "create_playlist":
+            self._new_playlist(op["name"])
+
+        elif kind == "delete_playlist":
+            self.playlist_ids.pop(op["name"], None)
+            self.playlist_keys.pop(op["name"], None)
+            self.playlist_stats.pop(op["name"], None)
+
+        elif kind == "add_to_playlist":
+            if op["name"] in self.playlist_ids:
+                self._add_members(op["name"], op["ids"])
+
+        elif kind == "remove_from_playlist":
+            if op["name"] in self.playlist_ids:
+                self._remove_member(op["name"], op["id"])
+
+
+def _token_match(query_tokens, track):
+    track_tokens = TokenIndex._tokens(track)
+    return all(any(token.startswith(q) for token in track_tokens) for q in query_tokens)
+
+
+def _substring_match(query, track):
+    return (query in track["title"].lower() or query in track["artist"].lower() or
+            query in track["album"].lower())
+
+
+class SearchSession:
+    """
+    Search-as-you-type over a LibraryIndex.
+    When a query extends an earlier one ("tay" -> "tayl"), its results can
+    only be a subset of the earlier results, so just those are re-checked.
+    Recent query -> result-ID lists live in a bounded LRU, which is dropped
+    whenever the library changes.
+    """
+
+    def __init__(self, index, mode="tokens", size=32):
+        self.index = index
+        self.mode = mode
+        self.size = size
+        self.recent = OrderedDict()
+        self.version = index.version
+
+    def _full_search(self, query):
+        if self.mode == "substring":
+            return [t["id"] for t in self.index.data.get("Tracks", []) if _substring_match(query, t)]
+        return self.index.search_ids(query)
+
+    def _narrow(self, base_ids, query):
+        by_id = self.index.by_id
+        if self.mode == "substring":
+            return [i for i in base_ids if i in by_id and _substring_match(query, by_id[i])]
+        query_tokens = tokenize(query)
+        return [i for i in base_ids if i in by_id and _token_match(query_tokens, by_id[i])]
+
+    def _closest_prefix(self, query):
+        """The longest cached query that the new query extends"""
+        best = None
+        for cached in self.recent:
+            if query.startswith(cached) and (best is None or len(cached) > len(best)):
+                if self.mode == "substring" or tokenize(cached):
+                    best = cached
+        return best
+
+    def search(self, query):
+        """Tracks matching query, reusing earlier results where possible"""
+        by_id = self.index.by_id
+        return [by_id[i] for i in self.search_ids(query) if i in by_id]
+
+    def search_ids(self, query):
+        """Like search(), but only the matching track IDs"""
+        if self.version != self.index.version:
+            self.recent.clear()
+            self.version = self.index.version
+
+        query = query.lower()
+        if query in self.recent:
+            self.recent.move_to_end(query)
+            ids = self.recent[query]
+        else:
+            base = self._closest_prefix(query)
+            ids = self._full_search(query) if base is None else self._narrow(self.recent[base], query)
+            self.recent[query] = ids
+            if len(self.recent) > self.size:
+                self.recent.popitem(last=False)
+        return ids
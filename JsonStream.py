@@ -0,0 +1,104 @@
+import json
+
+CHUNK_SIZE = 1 << 16
+DELIMITERS = ",:]} \t\r\n"
+
+class JsonStream:
+    """
+    Pull parser for one JSON document read from a file in chunks.
+    keys() walks an object and items() walks an array, one member at a time,
+    so a huge top-level array is never held as a whole; each member (or any
+    other value) is decoded with value(). Only the unread tail of the current
+    chunk is kept in memory.
+    """
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        """Read the next chunk; False once the file is exhausted"""
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ("" at the end)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def _error(self, expected):
+        return json.JSONDecodeError(f"Expecting {expected}", self.buffer, self.pos)
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise self._error(repr(char))
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off by the chunk edge ("12|34", "1.5|e3") decodes
+                # early, so only trust one that is followed by a delimiter
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read ever larger chunks so one big value is not re-decoded too often
+            self._fill(size)
+            size *= 2
+
+    def keys(self):
+        """
+        Yield the keys of the object starting here. The caller must consume
+        each key's value (value() or items()) before asking for the next key.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise self._error("property name")
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self._peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("',' or '}'")
+
+    def items(self):
+        """Yield the decoded members of the array starting here, one at a time"""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self._peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("',' or ']'")
@@ -1,18 +1,17 @@
 from Track import Track
-from Util_Jason import load, save
-from Duration import sec_to_min, total_duration
-from Sorting import merge_sort
-from Pagination import Pagination
+from Util_Jason import load, save, next_track_id, get_index, wait_for_playlists
+from Duration import sec_to_min, format_duration
+from Pagination import Pagination, CursorPagination
 
 class MusicLibrary:
-    def __init__(self):
-        self.data = load()
+    @property
+    def data(self):
+        """Shared in-memory store; only re-read when Storage.json changes on disk"""
+        return load()
     
     def _track_exists(self, title, artist):
         """Check if track already exists in library"""
-        return any(t["title"].lower().strip() == title.lower().strip() and 
-                   t["artist"].lower().strip() == artist.lower().strip() 
-                   for t in self.data.get("Tracks", []))
+        return get_index(self.data).has_track(title, artist)
             
     def createTrack(self):
         title = input("Enter Track Title: ")
@@ -22,8 +21,9 @@ class MusicLibrary:
         duration = input("Enter Track Duration (mm:ss): ")
 
         try:
-            if "Tracks" not in self.data:
-                self.data["Tracks"] = []
+            data = self.data
+            if "Tracks" not in data:
+                data["Tracks"] = []
 
             if self._track_exists(title, artist):
                 print("\n" + "!" * 60)
@@ -33,33 +33,30 @@ class MusicLibrary:
                 print("\nCannot add duplicate tracks. Please try a different track.\n")
                 return
 
-            track_id = len(self.data["Tracks"]) + 1
-            new_track = Track(track_id, title, artist, album, duration, featured_artist)
-            if new_track.duration == "invalid":
-                print("\n>> Failed to add track due to invalid input. Must be in mm:ss or in raw seconds.")
-            else:
-                self.data["Tracks"].append(new_track.to_dict())
-                save(self.data)
-                print("\nTrack Successfully Added to the Library!\n")
+            # Validate before taking an ID, so rejected input never uses one up
+            new_track = Track(None, title, artist, album, duration, featured_artist)
+            new_track.id = next_track_id(data)
+            data["Tracks"].append(new_track)
+            save(data, {"op": "add_track", "track": new_track})
+            print("\nTrack Successfully Added to the Library!\n")
 
         except ValueError as e:
             print(f"Error adding track: {e}")
 
-    def _paginated_display(self, tracks, title, selection_mode=False):
-        """Generic paginated display for tracks"""
-        if not tracks:
+    def _paginated_display(self, source, title, selection_mode=False):
+        """Generic keyset-paginated display over a sorted track source"""
+        pagination = CursorPagination(source, items_per_page=10)
+        if not pagination.rows:
             print("No tracks found.")
             return None
         
-        sorted_tracks = merge_sort(tracks, key="title")
-        pagination = Pagination(sorted_tracks, items_per_page=10)
-        
         while True:
+            total_pages = pagination.total_pages() or "?"
             print("\n" + "=" * 60)
-            print(f"{title} (Page {pagination.current_page}/{pagination.total_pages()})")
+            print(f"{title} (Page {pagination.current_page}/{total_pages})")
             print("=" * 60)
             
-            page_tracks = pagination.get_page_items(pagination.current_page)
+            page_tracks = pagination.get_page_items()
             start_index = pagination.start() + 1
             
             for idx, track in enumerate(page_tracks, start=start_index):
@@ -73,12 +70,12 @@ class MusicLibrary:
             choice = input("Choose: ").lower()
             
             if choice == 'n':
-                if pagination.current_page < pagination.total_pages():
+                if pagination.has_next():
                     pagination.next_page()
                 else:
                     print("Already at the last page.")
             elif choice == 'p':
-                if pagination.current_page > 1:
+                if pagination.has_previous():
                     pagination.previous_page()
                 else:
                     print("Already at the first page.")
@@ -86,30 +83,70 @@ class MusicLibrary:
                 return None
             elif selection_mode:
                 try:
-                    selection = int(choice) - 1
-                    if 0 <= selection < len(sorted_tracks):
-                        return sorted_tracks[selection]
-                    print("Invalid track number.")
+                    # Only the rows on the current page are fetched
+                    offset = int(choice) - start_index
+                    if 0 <= offset < len(page_tracks):
+                        return page_tracks[offset]
+                    print("Invalid track number. Choose one shown on this page.")
                 except ValueError:
                     print("Invalid input. Enter a number or N/P/Q.")
 
+    def getSortedTracks(self, key="title"):
+        """Library tracks sorted by key, from the incrementally maintained view (read-only)"""
+        return get_index(self.data).sorted_tracks(key)
+
     def displayTracks(self):
-        self._paginated_display(self.data.get("Tracks", []), "Tracks")
+        self._paginated_display(get_index(self.data).sorted_view("title"), "Tracks")
 
     def displayTracksForSelection(self):
-        return self._paginated_display(self.data.get("Tracks", []), "Select a Track", selection_mode=True)
+        return self._paginated_display(get_index(self.data).sorted_view("title"), "Select a Track", selection_mode=True)
+
+    def importTracks(self):
+        """Bulk-add tracks from a CSV or JSON Lines file"""
+        from Importer import import_tracks
+        path = input("Enter path to a .csv or .jsonl file: ").strip()
+        if not path:
+            print("No file given.")
+            return None
+        return import_tracks(path)
+
+    def exportTracks(self):
+        """Export the whole library to a .jsonl, .csv or .m3u file"""
+        from Exporter import export_library
+        path = input("Export to (.jsonl, .csv, .m3u or .m3u8): ").strip()
+        if path and export_library(path, self.data):
+            print(f"\nLibrary exported to {path}.")
 
     def getTotalDuration(self):
-        return total_duration(self.data, "Tracks")
+        return format_duration(get_index(self.data).stats.seconds)
+
+    def getDurationRange(self):
+        """Shortest and longest track as mm:ss, from the library's duration column"""
+        durations = get_index(self.data).duration_column()
+        return sec_to_min(durations.minimum()), sec_to_min(durations.maximum())
+
+    def removeTrack(self, track):
+        """Remove a track from the library and from every playlist, then save"""
+        wait_for_playlists()
+        data = self.data
+        data["Tracks"].remove(track)
+        
+        # Remove from all playlists
+        if "Playlists" in data:
+            for playlist in data["Playlists"]:
+                for track_ids in playlist.values():
+                    if track["id"] in track_ids:
+                        track_ids[:] = [i for i in track_ids if i != track["id"]]
+        
+        save(data, {"op": "delete_track", "track": track})
 
     def deleteTrack(self):
         """Delete a track from the library"""
-        tracks = self.data.get("Tracks", [])
-        if not tracks:
+        sorted_tracks = self.getSortedTracks("title")
+        if not sorted_tracks:
             print("\nNo tracks available to delete.")
             return None
         
-        sorted_tracks = merge_sort(tracks, key="title")
         pagination = Pagination(sorted_tracks, items_per_page=10)
         
         while True:
@@ -149,16 +186,7 @@ class MusicLibrary:
                         confirm = input(f"\nDelete '{track_to_delete['title']}' by {track_to_delete['artist']}? (y/n): ").lower()
                         
                         if confirm == 'y':
-                            self.data["Tracks"].remove(track_to_delete)
-                            
-                            # Remove from all playlists
-                            if "Playlists" in self.data:
-                                for playlist in self.data["Playlists"]:
-                                    for tracks in playlist.values():
-                                        if track_to_delete in tracks:
-                                            tracks.remove(track_to_delete)
-                            
-                            save(self.data)
+                            self.removeTrack(track_to_delete)
                             print(f"\nTrack '{track_to_delete['title']}' deleted successfully!")
                             print("(Also removed from all playlists)")
                             return track_to_delete
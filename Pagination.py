@@ -34,3 +34,106 @@ class Pagination:
     def end (self):
         end_index = self.start() + self.items_per_page
         return end_index
+
+
+class IteratorSource:
+    """
+    Cursor source over any iterator that already yields items in order.
+    Items are pulled only as pages are requested; the cursor is the
+    item's position in the stream.
+    """
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.seen = []
+        self.exhausted = False
+
+    def _fill(self, count):
+        while not self.exhausted and len(self.seen) < count:
+            try:
+                self.seen.append(next(self.iterator))
+            except StopIteration:
+                self.exhausted = True
+
+    def total(self):
+        # Unknown until the stream has been read to the end
+        return len(self.seen) if self.exhausted else None
+
+    def after(self, cursor, count):
+        start = 0 if cursor is None else cursor + 1
+        self._fill(start + count)
+        return [(i, self.seen[i]) for i in range(start, min(start + count, len(self.seen)))]
+
+    def before(self, cursor, count):
+        start = max(0, cursor - count)
+        return [(i, self.seen[i]) for i in range(start, cursor)]
+
+    def __getitem__(self, position):
+        if position < 0:
+            raise IndexError(position)
+        self._fill(position + 1)
+        return self.seen[position]
+
+    def __iter__(self):
+        """Every item, reading the rest of the stream as needed"""
+        position = 0
+        while True:
+            self._fill(position + 1)
+            if position >= len(self.seen):
+                return
+            yield self.seen[position]
+            position += 1
+
+
+class CursorPagination:
+    """
+    Keyset pagination: each page is fetched relative to the cursor (sort key)
+    of the last or first row already shown, so nothing beyond the requested
+    page has to be materialized or sorted.
+    `source` provides after(cursor, count) and before(cursor, count), both
+    returning [(cursor, item), ...] in ascending order, and total() (None if
+    unknown) - e.g. an IteratorSource or an Index.SortedView.
+    """
+    def __init__(self, source, items_per_page=10):
+        self.source = source
+        self.items_per_page = items_per_page
+        self.current_page = 1
+        self.rows = source.after(None, items_per_page)
+
+    def total_pages(self):
+        """Number of pages, or None while the source's length is unknown"""
+        total = self.source.total()
+        if total is None:
+            return None
+        return max(1, (total + self.items_per_page - 1) // self.items_per_page)
+
+    def get_page_items(self):
+        return [item for _, item in self.rows]
+
+    def has_next(self):
+        return bool(self.rows) and bool(self.source.after(self.rows[-1][0], 1))
+
+    def has_previous(self):
+        return self.current_page > 1
+
+    def next_page(self):
+        if self.rows:
+            rows = self.source.after(self.rows[-1][0], self.items_per_page)
+            if rows:
+                self.rows = rows
+                self.current_page += 1
+        return self.get_page_items()
+
+    def previous_page(self):
+        if self.rows and self.current_page > 1:
+            rows = self.source.before(self.rows[0][0], self.items_per_page)
+            if rows:
+                self.rows = rows
+                self.current_page -= 1
+        return self.get_page_items()
+
+    def reset(self):
+        self.current_page = 1
+        self.rows = self.source.after(None, self.items_per_page)
+
+    def start(self):
+        return (self.current_page - 1) * self.items_per_page
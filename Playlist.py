@@ -1,35 +1,52 @@
-from Util_Jason import load, save
+from Util_Jason import load, save, resolve_tracks, get_index, wait_for_playlists
+from Index import track_key, SearchSession
 from Duration import sec_to_min, format_duration
-from Sorting import merge_sort
-from Pagination import Pagination
+from Sorting import lazy_sort
+from Pagination import Pagination, CursorPagination, IteratorSource
 
 class Playlist:
     def __init__(self):
-        self.data = load()
+        # Filled by updatePlaylistList() on first use, so startup never
+        # waits for a large library's playlists to finish loading
         self.list = []
-        self.updatePlaylistList()  # Initialize list on creation
+        self._search_sessions = {}
+
+    @property
+    def data(self):
+        """Shared in-memory store, with its playlists fully loaded"""
+        wait_for_playlists()
+        return load()
 
     def updatePlaylistList(self):
-        """FIXED: Always reload data to ensure sync"""
-        self.data = load()
+        """Rebuild the list of playlist names from the shared store"""
         self.list = [name for playlist in self.data.get("Playlists", []) for name in playlist]
 
-    def _track_exists_in_playlist(self, track, playlist_tracks):
+    def _track_exists_in_playlist(self, track, playlist_name):
         """Check if track already exists in playlist"""
-        return any(t["id"] == track["id"] or 
-                   (t["title"].lower() == track["title"].lower() and 
-                    t["artist"].lower() == track["artist"].lower())
-                   for t in playlist_tracks)
+        return get_index(self.data).playlist_has(playlist_name, track)
 
-    def _find_playlist_tracks(self, playlist_name):
-        """Find and return tracks for a specific playlist"""
-        # Reload data to ensure freshness
-        self.data = load()
+    def _find_playlist_ids(self, playlist_name):
+        """Find and return the stored track IDs for a specific playlist"""
         for playlist in self.data.get("Playlists", []):
             if playlist_name in playlist:
                 return playlist[playlist_name]
         return None
 
+    def _find_playlist_tracks(self, playlist_name):
+        """Find and return tracks for a specific playlist"""
+        track_ids = self._find_playlist_ids(playlist_name)
+        if track_ids is None:
+            return None
+        return resolve_tracks(self.data, track_ids)
+
+    def searchSession(self, mode="tokens"):
+        """Incremental search session for the current library (see Index.SearchSession)"""
+        index = get_index(self.data)
+        session = self._search_sessions.get(mode)
+        if session is None or session.index is not index:
+            session = self._search_sessions[mode] = SearchSession(index, mode)
+        return session
+
     def _paginated_selection(self, items, title, item_formatter, allow_selection=False):
         """Generic paginated selection interface"""
         if not items:
@@ -80,22 +97,20 @@ class Playlist:
                 print("\nPlaylist name cannot be empty. Please try again.\n")
                 continue
             
-            # Reload to check for existing names
-            self.data = load()
-            
-            if "Playlists" not in self.data:
-                self.data["Playlists"] = []
+            data = self.data
+            if "Playlists" not in data:
+                data["Playlists"] = []
 
             if any(existing_name.lower() == playlistName.lower() 
-                   for playlist in self.data["Playlists"] 
+                   for playlist in data["Playlists"] 
                    for existing_name in playlist.keys()):
                 print("\n" + "!" * 60)
                 print("ERROR: Playlist name already exists!".center(60))
                 print("!" * 60 + "\n")
                 continue
 
-            self.data["Playlists"].append({playlistName: []})
-            save(self.data)
+            data["Playlists"].append({playlistName: []})
+            save(data, {"op": "create_playlist", "name": playlistName})
             print("\n" + "=" * 60)
             print("✓ Playlist added successfully!".center(60))
             print(f"'{playlistName}' created.".center(60))
@@ -103,6 +118,13 @@ class Playlist:
             self.updatePlaylistList()
             break
 
+    def exportPlaylist(self, playlist_name):
+        """Export a playlist to a .jsonl, .csv or .m3u file"""
+        from Exporter import export_playlist
+        path = input("Export to (.m3u, .m3u8, .jsonl or .csv): ").strip()
+        if path and export_playlist(playlist_name, path, self.data):
+            print(f"\nPlaylist '{playlist_name}' exported to {path}.")
+
     def displayTracks(self, playlist_index):
         """Display tracks in a specific playlist with pagination"""
         self.updatePlaylistList()  # Ensure fresh data
@@ -119,8 +141,8 @@ class Playlist:
                 print("\nNo tracks found in this playlist.")
                 return
 
-            sorted_tracks = merge_sort(playlist_tracks, key="title")
-            total_secs = sum(int(t.get("duration", 0)) for t in playlist_tracks)
+            sorted_tracks = lazy_sort(playlist_tracks, key="title")
+            stats = get_index(self.data).playlist_stats[playlist_name]
             
             def track_formatter(track):
                 feat = f" (ft. {track.get('featured_artist', '')})" if track.get('featured_artist') else ""
@@ -130,7 +152,7 @@ class Playlist:
             while True:
                 print("\n" + "=" * 60)
                 print(f"Playlist: '{playlist_name}' (Page {pagination.current_page}/{pagination.total_pages()})")
-                print(f"Total duration: {format_duration(total_secs)}")
+                print(f"Tracks: {stats.count} | Total duration: {format_duration(stats.seconds)}")
                 print("=" * 60)
                 
                 for idx, track in enumerate(pagination.get_page_items(pagination.current_page), 
@@ -197,33 +219,43 @@ class Playlist:
                     if choice:
                         print("Invalid option.")
 
-    def searchTrack(self, track):
-        """Search for tracks across library"""
-        self.data = load()
+    def searchTrack(self, track, mode="tokens"):
+        """
+        Search for tracks across library.
+        mode "tokens": every word of the query must start a word of the title,
+        artist, featured artist or album (served by the inverted index).
+        mode "substring": the query must appear anywhere in the title, artist
+        or album (full scan).
+        mode "fuzzy": typo-tolerant, ranked by trigram similarity.
+        Results are paged through an IteratorSource, so tracks are looked up
+        only for the pages shown; the returned source reads the rest on demand.
+        """
         tracks = self.data.get("Tracks", [])
         if not tracks:
             print("\nNo tracks available in the music library.")
             return None
 
-        track_lower = track.lower()
-        results = [t for t in tracks if track_lower in t["title"].lower() or 
-                   track_lower in t["artist"].lower() or track_lower in t["album"].lower()]
+        index = get_index(self.data)
+        if mode == "fuzzy":
+            results = iter(index.fuzzy_search(track))
+        else:
+            results = (index.by_id[i] for i in self.searchSession(mode).search_ids(track) if i in index.by_id)
 
-        if not results:
+        results = IteratorSource(results)
+        pagination = CursorPagination(results, items_per_page=10)
+        if not pagination.rows:
             return []
 
         def track_formatter(t):
             feat = f" (ft. {t.get('featured_artist', '')})" if t.get('featured_artist') else ""
             return f"{t['title']}{feat} by {t['artist']} ({t['duration']})"
         
-        pagination = Pagination(results, items_per_page=10)
         while True:
             print("\n" + "=" * 60)
-            print(f"Search Results (Page {pagination.current_page}/{pagination.total_pages()})")
+            print(f"Search Results (Page {pagination.current_page}/{pagination.total_pages() or '?'})")
             print("=" * 60)
             
-            for idx, t in enumerate(pagination.get_page_items(pagination.current_page), 
-                                   start=pagination.start() + 1):
+            for idx, t in enumerate(pagination.get_page_items(), start=pagination.start() + 1):
                 print(f"    [{idx}] {track_formatter(t)}")
             
             print("\n" + "-" * 60)
@@ -232,9 +264,9 @@ class Playlist:
             
             choice = input("Choose: ").lower().strip()
             if choice == 'n':
-                pagination.next_page() if pagination.current_page < pagination.total_pages() else print("Already at the last page.")
+                pagination.next_page() if pagination.has_next() else print("Already at the last page.")
             elif choice == 'p':
-                pagination.previous_page() if pagination.current_page > 1 else print("Already at the first page.")
+                pagination.previous_page() if pagination.has_previous() else print("Already at the first page.")
             elif choice == 'q':
                 break
             elif choice == 'c':
@@ -244,11 +276,9 @@ class Playlist:
 
     def searchedTracks(self, option, playlist_name, matching_tracks):
         """Add searched tracks to playlist"""
-        # FIXED: Reload data before accessing
-        self.data = load()
-        playlist_tracks = self._find_playlist_tracks(playlist_name)
+        track_ids = self._find_playlist_ids(playlist_name)
         
-        if playlist_tracks is None:
+        if track_ids is None:
             print("\nPlaylist not found.")
             return False
 
@@ -259,17 +289,17 @@ class Playlist:
                     print("\nOperation cancelled.")
                     return False
                 
-                track_index = int(track_input) - 1
-                if not 0 <= track_index < len(matching_tracks):
+                try:
+                    selected_track = matching_tracks[int(track_input) - 1]
+                except IndexError:
                     print("\nInvalid track selection.")
                     return False
 
-                selected_track = matching_tracks[track_index]
-                if self._track_exists_in_playlist(selected_track, playlist_tracks):
+                if self._track_exists_in_playlist(selected_track, playlist_name):
                     print(f"\n{'!' * 60}\nERROR: Track already in playlist!\n{'!' * 60}\n")
                 else:
-                    playlist_tracks.append(selected_track)
-                    save(self.data)
+                    track_ids.append(selected_track["id"])
+                    save(self.data, {"op": "add_to_playlist", "name": playlist_name, "ids": [selected_track["id"]]})
                     print(f"\n✓ Track '{selected_track['title']}' added to playlist '{playlist_name}'.")
                 return True
             except ValueError:
@@ -277,17 +307,21 @@ class Playlist:
                 return False
 
         elif option == 2:
-            added_count = 0
+            added_ids = []
+            added_keys = set()
             skipped_count = 0
             for track in matching_tracks:
-                if not self._track_exists_in_playlist(track, playlist_tracks):
-                    playlist_tracks.append(track)
-                    added_count += 1
+                key = track_key(track["title"], track["artist"])
+                if key not in added_keys and not self._track_exists_in_playlist(track, playlist_name):
+                    added_ids.append(track["id"])
+                    added_keys.add(key)
                 else:
                     skipped_count += 1
             
+            added_count = len(added_ids)
             if added_count > 0:
-                save(self.data)
+                track_ids.extend(added_ids)
+                save(self.data, {"op": "add_to_playlist", "name": playlist_name, "ids": added_ids})
                 print(f"\n{'=' * 60}\n✓ {added_count} track(s) added to '{playlist_name}'")
                 if skipped_count > 0:
                     print(f"{skipped_count} duplicate(s) skipped")
@@ -300,8 +334,7 @@ class Playlist:
 
     def displayTracksForSelection(self):
         """Display tracks for selection"""
-        self.data = load()  # Ensure fresh data
-        tracks = merge_sort(self.data.get("Tracks", []), key="title")
+        tracks = get_index(self.data).sorted_tracks("title")
         def track_formatter(t):
             feat = f" (ft. {t.get('featured_artist', '')})" if t.get('featured_artist') else ""
             return f"{t['title']}{feat} by {t['artist']} ({sec_to_min(t['duration'])})"
@@ -314,31 +347,26 @@ class Playlist:
             print("\nTrack addition cancelled.")
             return
 
-        # FIXED: Reload to get fresh playlist data
-        self.data = load()
-        
-        playlist_tracks = self._find_playlist_tracks(playlist_name)
-        if playlist_tracks is None:
+        track_ids = self._find_playlist_ids(playlist_name)
+        if track_ids is None:
             print("\nPlaylist not found.")
             return
 
-        if self._track_exists_in_playlist(selected_track, playlist_tracks):
+        if self._track_exists_in_playlist(selected_track, playlist_name):
             print(f"\n{'!' * 60}\nERROR: Track already in playlist!\n{'!' * 60}\n")
         else:
-            playlist_tracks.append(selected_track)
-            save(self.data)
+            track_ids.append(selected_track["id"])
+            save(self.data, {"op": "add_to_playlist", "name": playlist_name, "ids": [selected_track["id"]]})
             print(f"\n{'=' * 60}\n✓ Track added successfully!\n{'=' * 60}\n")
 
     def removeTrackFromPlaylist(self, playlist_name):
         """Remove a track from playlist"""
-        self.data = load()
-        
         playlist_tracks = self._find_playlist_tracks(playlist_name)
         if playlist_tracks is None or not playlist_tracks:
             print("\nThis playlist has no tracks to remove.")
             return
         
-        sorted_tracks = merge_sort(playlist_tracks, key="title")
+        sorted_tracks = lazy_sort(playlist_tracks, key="title")
         
         def track_formatter(t):
             feat = f" (ft. {t.get('featured_artist', '')})" if t.get('featured_artist') else ""
@@ -349,8 +377,8 @@ class Playlist:
         
         if selected:
             if input(f"\nRemove '{selected['title']}'? (y/n): ").lower() == 'y':
-                playlist_tracks.remove(selected)
-                save(self.data)
+                self._find_playlist_ids(playlist_name).remove(selected["id"])
+                save(self.data, {"op": "remove_from_playlist", "name": playlist_name, "id": selected["id"]})
                 print(f"\nTrack '{selected['title']}' removed from playlist '{playlist_name}'.")
             else:
                 print("\nRemoval cancelled.")
@@ -374,12 +402,11 @@ class Playlist:
             
             playlist_name = self.list[idx]
             if input(f"\nAre you sure you want to delete '{playlist_name}'? (y/n): ").lower() == 'y':
-                # Reload to ensure we're modifying fresh data
-                self.data = load()
-                for i, playlist in enumerate(self.data["Playlists"]):
+                data = self.data
+                for i, playlist in enumerate(data["Playlists"]):
                     if playlist_name in playlist:
-                        self.data["Playlists"].pop(i)
-                        save(self.data)
+                        data["Playlists"].pop(i)
+                        save(data, {"op": "delete_playlist", "name": playlist_name})
                         print(f"\nPlaylist '{playlist_name}' deleted successfully!")
                         self.updatePlaylistList()
                         return
@@ -1,29 +1,276 @@
 from Duration import sec_to_min
-from Util_Jason import save_queue, load_queue
+from Util_Jason import save_queue, load_queue, get_index
+from array import array
+from bisect import bisect_left
+import atexit
+import os
 import random
+import time
+import weakref
+
+# "linked" (Queue) or "array" (ArrayQueue); see new_queue()
+QUEUE_ENGINE = os.environ.get("MUSIC_QUEUE_ENGINE", "linked")
+
+# Set to make shuffle order reproducible (e.g. for benchmarks)
+SHUFFLE_SEED = os.environ.get("MUSIC_SHUFFLE_SEED")
+
+# Queue changes are written behind: after this many changes, or on the
+# first change once the oldest unsaved one is this many seconds old. The
+# menus flush whatever is pending when leaving the player, and anything
+# left is written on exit.
+FLUSH_EVERY = 20
+FLUSH_INTERVAL = 2.0
+
+# Writers of live queues; a queue that goes away takes its writer with it
+_writers = weakref.WeakSet()
+
+@atexit.register
+def _flush_all():
+    for writer in list(_writers):
+        writer.flush()
+
+class QueueWriter:
+    """Coalesces bursts of queue changes into a single Queue_State.json write"""
+    def __init__(self, queue):
+        # Weak, so dropping a queue drops its writer from _writers at once
+        self.queue = weakref.proxy(queue)
+        self.pending = 0
+        self.since = None
+        _writers.add(self)
+
+    def touch(self):
+        """Record one change; write if enough changes or time have piled up"""
+        now = time.monotonic()
+        if self.since is None:
+            self.since = now
+        self.pending += 1
+        if self.pending >= FLUSH_EVERY or now - self.since >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write any pending changes now"""
+        if self.pending:
+            self.discard()
+            self.queue._write_state()
+
+    def discard(self):
+        self.pending = 0
+        self.since = None
+
+class ShuffleOrder:
+    """
+    A Fisher-Yates permutation of the queue entries walked with a cursor.
+    Entries before the cursor are the shuffle history, so next/prev are
+    O(1) steps. Added entries are swapped into a random unplayed slot and
+    removed ones leave a hole that is skipped, so edits never force a full
+    reshuffle. A fresh permutation is drawn only when a cycle runs out,
+    and it never starts with the track that just played.
+    """
+    def __init__(self, entries, current, rng):
+        self.rng = rng
+        self.order = [entry for entry in entries if entry != current]
+        rng.shuffle(self.order)
+        # The current entry counts as already played
+        if current is not None:
+            self.order.insert(0, current)
+        self.at = 0 if current is not None else -1
+        self.live = len(self.order)
+        self.dead = 0
+        self._reindex()
+
+    def _reindex(self):
+        self.pos = {entry: i for i, entry in enumerate(self.order) if entry is not None}
+
+    def _place(self, i, entry):
+        self.order[i] = entry
+        if entry is not None:
+            self.pos[entry] = i
+
+    def add(self, entry):
+        """Insert at a uniformly random position among the unplayed entries"""
+        self.order.append(entry)
+        last = len(self.order) - 1
+        j = self.rng.randint(self.at + 1, last)
+        self._place(last, self.order[j])
+        self._place(j, entry)
+        self.live += 1
+
+    def remove(self, entry):
+        i = self.pos.pop(entry, None)
+        if i is None:
+            return
+        self.live -= 1
+        if i > self.at:
+            # Unplayed order is random anyway: fill the gap with the last entry
+            last = self.order.pop()
+            if i < len(self.order):
+                self._place(i, last)
+        else:
+            # Keep the history in order; the hole is skipped and compacted later
+            self.order[i] = None
+            self.dead += 1
+
+    def next(self):
+        """Step forward, starting a new cycle when this one is used up"""
+        if not self.live:
+            return None
+        played = self.order[self.at] if 0 <= self.at < len(self.order) else None
+        self.at += 1
+        while self.at < len(self.order) and self.order[self.at] is None:
+            self.at += 1
+        if self.at == len(self.order):
+            self._new_cycle(played)
+        elif self.dead > 64 and self.dead > self.live:
+            self._compact()
+        return self.order[self.at]
+
+    def prev(self):
+        """Step back through the history, wrapping to the end of the cycle"""
+        if not self.live:
+            return None
+        i = self.at - 1
+        while True:
+            if i < 0:
+                i = len(self.order) - 1
+            if self.order[i] is not None:
+                break
+            i -= 1
+        self.at = i
+        return self.order[i]
+
+    def seek(self, entry):
+        """
+        Put the cursor on entry, for when the queue picks a new current
+        track itself (e.g. the playing one was removed); entry counts as
+        played, so next() moves on to a different one
+        """
+        i = self.pos.get(entry)
+        if i is None or i == self.at:
+            return
+        if self.at >= 0 and self.order[self.at] is None:
+            # The entry under the cursor is gone: entry takes its slot
+            if i > self.at:
+                last = self.order.pop()
+                if i < len(self.order):
+                    self._place(i, last)
+                self.dead -= 1
+            else:
+                self.order[i] = None
+        else:
+            if i > self.at:
+                self.at += 1
+            self._place(i, self.order[self.at])
+        self._place(self.at, entry)
+
+    def rename(self, mapping):
+        """Give entries new identities, keeping their places in the order"""
+        self.order = [mapping[entry] if entry is not None else None for entry in self.order]
+        self._reindex()
+
+    def _new_cycle(self, played):
+        self.order = [entry for entry in self.order if entry is not None]
+        self.rng.shuffle(self.order)
+        if len(self.order) > 1 and self.order[0] == played:
+            j = self.rng.randrange(1, len(self.order))
+            self.order[0], self.order[j] = self.order[j], self.order[0]
+        self.at = 0
+        self.dead = 0
+        self._reindex()
+
+    def _compact(self):
+        # Only called with the cursor on a live entry
+        self.at -= sum(1 for entry in self.order[:self.at] if entry is None)
+        self.order = [entry for entry in self.order if entry is not None]
+        self.dead = 0
+        self._reindex()
+
 
 class Node:
     def __init__(self, track=None):
         self.track = track
         self.next = None
         self.prev = None
+        self.slot = None  # position in Queue._slots
 
 class Queue:
-    def __init__(self):
+    def __init__(self, seed=SHUFFLE_SEED):
+        self.rng = random.Random(seed)
+        self._reset()
+        self.writer = QueueWriter(self)
+
+    def _reset(self):
         self.front = self.rear = self.current = None
         self.size = 0
         self.shuffle_ = self.repeat_ = self.playing_ = False
-        self.queuelist = []
+        # Unordered array of the live nodes for O(1) random picks; each node
+        # knows its slot so removal is a swap with the last entry
+        self._slots = []
+        self._shuffle = None
+
+    def _nodes(self):
+        """Iterate nodes in queue order, front to rear"""
+        node = self.front
+        for _ in range(self.size):
+            yield node
+            node = node.next
+
+    def _unlink(self, node):
+        """Detach a node from the ring and the slot array in O(1)"""
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        last = self._slots.pop()
+        if last is not node:
+            self._slots[node.slot] = last
+            last.slot = node.slot
+        if self._shuffle is not None:
+            self._shuffle.remove(node)
+
+    def _shuffle_order(self):
+        """The shuffle permutation, drawn on first use after shuffle is turned on"""
+        if self._shuffle is None:
+            self._shuffle = ShuffleOrder(self._slots, self.current, self.rng)
+        return self._shuffle
+
+    def _follow_current(self):
+        # current moved without going through the shuffle order
+        if self._shuffle is not None and self.current is not None:
+            self._shuffle.seek(self.current)
+
+    def _ordered(self):
+        """Yield (track, is_current) front to rear"""
+        for node in self._nodes():
+            yield node.track, node is self.current
+
+    def _current_track(self):
+        return self.current.track if self.current else None
+
+    def _set_current_index(self, index):
+        # Freshly enqueued, so slot order is still queue order
+        self.current = self._slots[index]
 
     def save_state(self):
-        """Save queue state to JSON"""
+        """Mark the queue state as changed; QueueWriter decides when to write it"""
+        self.writer.touch()
+
+    def flush_state(self):
+        """Write any pending queue state to disk immediately"""
+        self.writer.flush()
+
+    def _write_state(self):
+        """Save queue state (track IDs and position only) to JSON"""
         if self.size == 0:
             save_queue(None)
             return
         
-        current_index = next((i for i, node in enumerate(self.queuelist) if node == self.current), None)
+        # The current index falls out of the same walk that collects the IDs
+        track_ids = []
+        current_index = None
+        for i, (track, is_current) in enumerate(self._ordered()):
+            track_ids.append(track["id"])
+            if is_current:
+                current_index = i
         save_queue({
-            "tracks": [node.track for node in self.queuelist],
+            "track_ids": track_ids,
             "current_index": current_index,
             "shuffle": self.shuffle_,
             "repeat": self.repeat_,
@@ -31,17 +278,32 @@ class Queue:
         })
 
     def load_state(self):
-        """Load queue state from JSON"""
+        """Load queue state from JSON, resolving track IDs through the library"""
         state = load_queue()
         if not state:
             return False
         
-        self.__init__()
-        for track in state["tracks"]:
+        # Older files embed the track dicts; keep them for tracks no longer in the library
+        saved = {track["id"]: track for track in state.get("tracks", [])}
+        track_ids = state.get("track_ids") or [track["id"] for track in state.get("tracks", [])]
+        index = get_index()
+        
+        self._reset()
+        current_index = None
+        for i, track_id in enumerate(track_ids):
+            track = index.get(track_id) or saved.get(track_id)
+            if track is None:
+                continue
+            if i == state["current_index"]:
+                current_index = self.size
             self.enqueue(track, save=False)
         
-        if state["current_index"] is not None and state["current_index"] < len(self.queuelist):
-            self.current = self.queuelist[state["current_index"]]
+        if self.size == 0:
+            self.save_state()
+            return False
+        
+        if current_index is not None:
+            self._set_current_index(current_index)
         
         self.shuffle_ = state.get("shuffle", False)
         self.repeat_ = state.get("repeat", False)
@@ -62,7 +324,10 @@ class Queue:
             self.rear = new_node
         
         self.size += 1
-        self.queuelist.append(new_node)
+        new_node.slot = len(self._slots)
+        self._slots.append(new_node)
+        if self._shuffle is not None:
+            self._shuffle.add(new_node)
         if save:
             self.save_state()
         return True
@@ -80,19 +345,18 @@ class Queue:
         
         removed_track = self.front.track
         if self.size == 1:
-            self.__init__()
+            self._reset()
             self.save_state()
             return removed_track
         
         # Store next node before removing
         next_node = self.front.next
         
-        self.queuelist.remove(self.front)
-        self.front.prev.next = self.front.next
-        self.front.next.prev = self.front.prev
+        self._unlink(self.front)
         
         if self.current == self.front:
             self.current = next_node
+            self._follow_current()
         
         self.front = next_node
         self.size -= 1
@@ -100,22 +364,25 @@ class Queue:
         return removed_track
 
     def remove_current(self):
-        """Remove the currently playing track"""
+        """Remove the currently playing track; the next one in queue order takes over"""
+        removed_track = self._remove_current()
+        self._follow_current()
+        return removed_track
+
+    def _remove_current(self):
         if self.size == 0 or not self.current:
             return None
         
         removed_track = self.current.track
         if self.size == 1:
-            self.__init__()
+            self._reset()
             self.save_state()
             return removed_track
         
         # Store next node before removing current
         next_node = self.current.next
         
-        self.queuelist.remove(self.current)
-        self.current.prev.next = self.current.next
-        self.current.next.prev = self.current.prev
+        self._unlink(self.current)
         
         if self.current == self.front:
             self.front = self.current.next
@@ -128,11 +395,129 @@ class Queue:
         self.save_state()
         return removed_track
 
+    # ---------- Batch operations: one pass, one save ----------
+
+    def _node_at(self, index):
+        """Node at a queue position, walking from whichever end is closer"""
+        if index <= self.size // 2:
+            node = self.front
+            for _ in range(index):
+                node = node.next
+        else:
+            node = self.rear
+            for _ in range(self.size - 1 - index):
+                node = node.prev
+        return node
+
+    def _splice(self, index, first, last):
+        """Link the chain first..last in before position index"""
+        after = self._node_at(index) if index < self.size else self.front
+        before = after.prev
+        before.next, first.prev = first, before
+        last.next, after.prev = after, last
+        if index == 0:
+            self.front = first
+        if index == self.size:
+            self.rear = last
+
+    def insert_many(self, index, tracks):
+        """Insert tracks before position index (list.insert rules); returns the count"""
+        tracks = list(tracks)
+        if not tracks:
+            return 0
+        if self.size == 0:
+            self.enqueue_playlist(tracks)
+            return len(tracks)
+        
+        index = slice(index, None).indices(self.size)[0]
+        nodes = [Node(track) for track in tracks]
+        for a, b in zip(nodes, nodes[1:]):
+            a.next, b.prev = b, a
+        self._splice(index, nodes[0], nodes[-1])
+        
+        for node in nodes:
+            node.slot = len(self._slots)
+            self._slots.append(node)
+            if self._shuffle is not None:
+                self._shuffle.add(node)
+        self.size += len(nodes)
+        self.save_state()
+        return len(nodes)
+
+    def remove_range(self, start, stop):
+        """Remove positions start..stop-1 (slice rules); returns the removed tracks"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop:
+            return []
+        if stop - start == self.size:
+            removed = [track for track, _ in self._ordered()]
+            self._reset()
+            self.save_state()
+            return removed
+        
+        removed = []
+        current_removed = False
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            following = node.next
+            current_removed = current_removed or node is self.current
+            self._unlink(node)
+            removed.append(node.track)
+            node = following
+        
+        # node is the first survivor after the range (the front if it ran to the end)
+        if start == 0:
+            self.front = node
+        if stop == self.size:
+            self.rear = node.prev
+        if current_removed:
+            self.current = node
+            self._follow_current()
+        self.size -= len(removed)
+        self.save_state()
+        return removed
+
+    def move_range(self, start, stop, to):
+        """Move positions start..stop-1 so the block starts at position to"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        count = stop - start
+        if count <= 0:
+            return False
+        to = max(0, min(to, self.size - count))
+        if to == start:
+            return True
+        
+        first = self._node_at(start)
+        last = first
+        for _ in range(count - 1):
+            last = last.next
+        
+        # Detach the block, then splice it back in among the remaining nodes
+        first.prev.next, last.next.prev = last.next, first.prev
+        if self.front is first:
+            self.front = last.next
+        if self.rear is last:
+            self.rear = first.prev
+        self.size -= count
+        self._splice(to, first, last)
+        self.size += count
+        self.save_state()
+        return True
+
+    def replace_all(self, tracks):
+        """Replace the queue contents, keeping shuffle/repeat/playing; returns the count"""
+        flags = self.shuffle_, self.repeat_, self.playing_
+        self._reset()
+        self.shuffle_, self.repeat_, self.playing_ = flags
+        tracks = list(tracks)
+        self.enqueue_playlist(tracks)
+        return len(tracks)
+
     def current_play(self):
         """Return formatted string of currently playing track"""
-        if self.size == 0 or not self.current:
+        track = self._current_track()
+        if self.size == 0 or not track:
             return "No track is currently playing."
-        track = self.current.track
         feat = f" (ft. {track.get('featured_artist', '')})" if track.get('featured_artist') else ""
         return f"{track['title']}{feat} by {track['artist']} ({sec_to_min(track['duration'])})"
 
@@ -144,7 +529,7 @@ class Queue:
         - Shuffle OFF, Repeat OFF: FIFO, tracks removed
         - Shuffle OFF, Repeat ON:  FIFO, tracks re-added to end
         - Shuffle ON,  Repeat OFF: Random removal until empty
-        - Shuffle ON,  Repeat ON:  Random selection, tracks kept (THIS WAS BROKEN)
+        - Shuffle ON,  Repeat ON:  Every track once per shuffled cycle, tracks kept
         """
         if self.size == 0:
             return "Queue is empty. No tracks to play."
@@ -153,25 +538,24 @@ class Queue:
 
         # ========== SHUFFLE MODE ==========
         if self.shuffle_:
+            order = self._shuffle_order()
             if self.repeat_:
                 # Shuffle + Repeat = Keep all tracks, just change current pointer
-                # Don't remove anything, just pick a random track
                 if self.size == 1:
                     # Only one track, keep playing it
                     self.save_state()
                     return self.current.track
                 else:
-                    # Pick a random track (can be same track, that's valid shuffle behavior)
-                    self.current = self.queuelist[random.randint(0, self.size - 1)]
+                    # Next in the permutation; never the same track twice in a row
+                    self.current = order.next()
                     self.save_state()
                     return self.current.track
             else:
-                # Shuffle + No Repeat = Remove tracks randomly
+                # Shuffle + No Repeat = Remove tracks in permutation order
                 if self.current:
-                    self.remove_current()
+                    self._remove_current()
                 if self.size > 0:
-                    # Pick random from remaining tracks
-                    self.current = self.queuelist[random.randint(0, self.size - 1)]
+                    self.current = order.next()
                     return self.current.track
                 return "Queue is now empty."
 
@@ -201,7 +585,11 @@ class Queue:
         if self.size == 0:
             return "Queue is empty."
         
-        self.current = self.current.prev
+        # In shuffle mode, back through the shuffle history instead
+        if self.shuffle_:
+            self.current = self._shuffle_order().prev()
+        else:
+            self.current = self.current.prev
         self.save_state()
         return self.current.track
 
@@ -215,6 +603,7 @@ class Queue:
 
     def toggle_shuffle(self):
         self.shuffle_ = not self.shuffle_
+        self._shuffle = None
         self.save_state()
         return self.shuffle_
     
@@ -231,7 +620,8 @@ class Queue:
     
     def clear_queue(self):
         """Completely clear the queue"""
-        self.__init__()
+        self._reset()
+        self.writer.discard()
         save_queue(None)
 
     def display(self):
@@ -240,11 +630,11 @@ class Queue:
             return ""
         
         tracks = ["Tracks:"]
-        for i, node in enumerate(self.queuelist, 1):
-            is_current = " ▶" if node == self.current else ""
-            feat = f" (ft. {node.track.get('featured_artist', '')})" if node.track.get('featured_artist') else ""
-            tracks.append(f"    [{i}] {node.track['title']}{feat} by {node.track['artist']} - "
-                         f"{node.track['album']} ({sec_to_min(node.track['duration'])}){is_current}")
+        for i, (track, current) in enumerate(self._ordered(), 1):
+            is_current = " ▶" if current else ""
+            feat = f" (ft. {track.get('featured_artist', '')})" if track.get('featured_artist') else ""
+            tracks.append(f"    [{i}] {track['title']}{feat} by {track['artist']} - "
+                         f"{track['album']} ({sec_to_min(track['duration'])}){is_current}")
         return '\n'.join(tracks)
 
     def __str__(self):
@@ -252,12 +642,351 @@ class Queue:
             return "Queue is empty."
         
         lines = ["Tracks:"]
-        current = self.front
-        for i in range(self.size):
-            track = current.track
-            is_current = " ▶" if current == self.current else ""
+        for i, (track, current) in enumerate(self._ordered(), 1):
+            is_current = " ▶" if current else ""
             feat = f" (ft. {track.get('featured_artist', '')})" if track.get('featured_artist') else ""
-            lines.append(f"\t[{i + 1}] {track['title']}{feat} by {track['artist']} - "
+            lines.append(f"\t[{i}] {track['title']}{feat} by {track['artist']} - "
                         f"{track['album']} ({sec_to_min(track['duration'])}){is_current}")
-            current = current.next
         return '\n'.join(lines)
+
+
+# Marks an ArrayQueue slot whose entry was removed from the middle
+_HOLE = -1
+
+class ArrayQueue(Queue):
+    """
+    Queue engine backed by a compact array of track IDs instead of one Node
+    per entry. The window ids[head:] holds the entries in queue order; the
+    current track is an offset from head. Taking the front just advances
+    head, and FIFO + repeat appends at the tail while advancing head, so
+    the window rotates like a ring buffer; the consumed prefix is compacted
+    away lazily. Removing the current track from the middle leaves a hole
+    instead of shifting the tail; holes are skipped, and squeezed out in one
+    pass before edits by position or once they outnumber the live entries.
+    A parallel array of increasing entry numbers (tickets) gives each entry
+    a stable identity for the shuffle order, found again by bisection.
+    Same behaviour as Queue for every shuffle/repeat combination.
+    """
+    def _reset(self):
+        self.size = 0
+        self.shuffle_ = self.repeat_ = self.playing_ = False
+        self.ids = array('q')
+        self.tickets = array('q')
+        self.issued = 0
+        self._shuffle = None
+        self.head = 0
+        self.holes = 0          # removed slots still inside the window
+        self.offset = None      # current track, relative to head
+        self.tracks = {}        # id -> track dict (shared, not copied)
+        self.uses = {}          # id -> live entries holding it
+
+    def _compact(self):
+        if self.head > 1024 and self.head * 2 > len(self.ids):
+            del self.ids[:self.head]
+            del self.tickets[:self.head]
+            self.head = 0
+
+    def _squeeze(self):
+        """Drop the holes from the window, keeping the current track"""
+        if not self.holes:
+            return
+        current = self.tickets[self.head + self.offset]
+        ids, tickets = self.ids, self.tickets
+        live = [p for p in range(self.head, len(ids)) if ids[p] != _HOLE]
+        self.ids = array('q', map(ids.__getitem__, live))
+        self.tickets = array('q', map(tickets.__getitem__, live))
+        self.head = self.holes = 0
+        self.offset = self._offset_of(current)
+
+    def _track(self, offset):
+        return self.tracks[self.ids[self.head + offset]]
+
+    def _ordered(self):
+        ids = self.ids
+        for p in range(self.head, len(ids)):
+            if ids[p] != _HOLE:
+                yield self.tracks[ids[p]], p - self.head == self.offset
+
+    def _current_track(self):
+        return self._track(self.offset) if self.size and self.offset is not None else None
+
+    def _set_current_index(self, index):
+        self.offset = index
+
+    def _follow_current(self):
+        if self._shuffle is not None and self.offset is not None:
+            self._shuffle.seek(self.tickets[self.head + self.offset])
+
+    def _shuffle_order(self):
+        if self._shuffle is None:
+            self._squeeze()
+            current = self.tickets[self.head + self.offset] if self.offset is not None else None
+            self._shuffle = ShuffleOrder(self.tickets[self.head:], current, self.rng)
+        return self._shuffle
+
+    def _offset_of(self, ticket):
+        return bisect_left(self.tickets, ticket, self.head) - self.head
+
+    def _issue(self, count):
+        first = self.issued
+        self.issued += count
+        self.tickets.extend(range(first, self.issued))
+        if self._shuffle is not None:
+            for ticket in range(first, self.issued):
+                self._shuffle.add(ticket)
+
+    def _hold(self, tracks):
+        for track in tracks:
+            self.tracks[track["id"]] = track
+            self.uses[track["id"]] = self.uses.get(track["id"], 0) + 1
+
+    def _drop(self, offset):
+        """Forget the entry at offset in the shuffle order and the track map"""
+        if self._shuffle is not None:
+            self._shuffle.remove(self.tickets[self.head + offset])
+        track_id = self.ids[self.head + offset]
+        if self.uses[track_id] > 1:
+            self.uses[track_id] -= 1
+        else:
+            del self.uses[track_id], self.tracks[track_id]
+
+    def _pop_front(self):
+        """Advance head past the front entry and any holes behind it; returns the step"""
+        self._drop(0)
+        step = 1
+        self.size -= 1
+        while self.ids[self.head + step] == _HOLE:
+            step += 1
+        self.holes -= step - 1
+        self.head += step
+        return step
+
+    def enqueue(self, track, save=True):
+        """Add track to queue"""
+        self._hold((track,))
+        self.ids.append(track["id"])
+        self._issue(1)
+        if self.size == 0:
+            self.offset = 0
+        self.size += 1
+        if save:
+            self.save_state()
+        return True
+
+    def enqueue_playlist(self, playlist_tracks):
+        """Add multiple tracks from playlist"""
+        playlist_tracks = list(playlist_tracks)
+        self._hold(playlist_tracks)
+        self.ids.extend(track["id"] for track in playlist_tracks)
+        self._issue(len(playlist_tracks))
+        if self.size == 0 and playlist_tracks:
+            self.offset = 0
+        self.size += len(playlist_tracks)
+        self.save_state()
+
+    def dequeue(self):
+        """Remove and return the front track (FIFO)"""
+        if self.size == 0:
+            return None
+        
+        removed_track = self._track(0)
+        if self.size == 1:
+            self._reset()
+            self.save_state()
+            return removed_track
+        
+        step = self._pop_front()
+        # The current track keeps its place; if it was the front, the
+        # next track becomes current
+        if self.offset:
+            self.offset -= step
+        else:
+            self._follow_current()
+        self._compact()
+        self.save_state()
+        return removed_track
+
+    def remove_current(self):
+        """Remove the currently playing track; the next one in queue order takes over"""
+        removed_track = self._remove_current()
+        self._follow_current()
+        return removed_track
+
+    def _remove_current(self):
+        if self.size == 0 or self.offset is None:
+            return None
+        
+        removed_track = self._track(self.offset)
+        if self.size == 1:
+            self._reset()
+            self.save_state()
+            return removed_track
+        
+        if self.offset == 0:
+            self._pop_front()
+        else:
+            # Leave a hole rather than shift the tail; the tail itself is
+            # trimmed so the last slot is always live
+            self._drop(self.offset)
+            ids = self.ids
+            position = self.head + self.offset
+            ids[position] = _HOLE
+            self.holes += 1
+            self.size -= 1
+            while ids[-1] == _HOLE:
+                ids.pop()
+                self.tickets.pop()
+                self.holes -= 1
+            # Current moves on to the next track, wrapping to the front
+            if position < len(ids):
+                while ids[position] == _HOLE:
+                    position += 1
+                self.offset = position - self.head
+            else:
+                self.offset = 0
+            if self.holes > self.size:
+                self._squeeze()
+        self._compact()
+        self.save_state()
+        return removed_track
+
+    def _renumber(self):
+        """
+        Give the live window fresh increasing tickets after entries were
+        inserted or moved out of order; new entries carry ticket -1
+        """
+        old = self.tickets[self.head:]
+        fresh = range(self.issued, self.issued + self.size)
+        self.issued += self.size
+        if self._shuffle is not None:
+            self._shuffle.rename({a: b for a, b in zip(old, fresh) if a >= 0})
+            for a, b in zip(old, fresh):
+                if a < 0:
+                    self._shuffle.add(b)
+        self.tickets[self.head:] = array('q', fresh)
+
+    def insert_many(self, index, tracks):
+        """Insert tracks before position index (list.insert rules); returns the count"""
+        tracks = list(tracks)
+        if not tracks:
+            return 0
+        index = slice(index, None).indices(self.size)[0]
+        if index == self.size:
+            self.enqueue_playlist(tracks)
+            return len(tracks)
+        
+        self._squeeze()
+        self._hold(tracks)
+        position = self.head + index
+        self.ids[position:position] = array('q', (track["id"] for track in tracks))
+        self.tickets[position:position] = array('q', [-1]) * len(tracks)
+        self.size += len(tracks)
+        if self.offset >= index:
+            self.offset += len(tracks)
+        self._renumber()
+        self.save_state()
+        return len(tracks)
+
+    def remove_range(self, start, stop):
+        """Remove positions start..stop-1 (slice rules); returns the removed tracks"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop:
+            return []
+        self._squeeze()
+        removed = [self._track(offset) for offset in range(start, stop)]
+        if stop - start == self.size:
+            self._reset()
+            self.save_state()
+            return removed
+        
+        for offset in range(start, stop):
+            self._drop(offset)
+        del self.ids[self.head + start:self.head + stop]
+        del self.tickets[self.head + start:self.head + stop]
+        self.size -= len(removed)
+        # Current moves on to the first survivor after the range, wrapping to the front
+        if self.offset >= stop:
+            self.offset -= len(removed)
+        elif self.offset >= start:
+            self.offset = start if start < self.size else 0
+            self._follow_current()
+        self.save_state()
+        return removed
+
+    def move_range(self, start, stop, to):
+        """Move positions start..stop-1 so the block starts at position to"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        count = stop - start
+        if count <= 0:
+            return False
+        to = max(0, min(to, self.size - count))
+        if to == start:
+            return True
+        
+        self._squeeze()
+        h = self.head
+        current = self.tickets[h + self.offset]
+        for column in (self.ids, self.tickets):
+            block = column[h + start:h + stop]
+            del column[h + start:h + stop]
+            column[h + to:h + to] = block
+        self.offset = self.tickets.index(current, h) - h
+        self._renumber()
+        self.save_state()
+        return True
+
+    def next(self):
+        """Move to next track - same shuffle/repeat behaviour as Queue.next"""
+        if self.size == 0:
+            return "Queue is empty. No tracks to play."
+
+        current_track = self._current_track()
+
+        if self.shuffle_:
+            order = self._shuffle_order()
+            if self.repeat_:
+                if self.size > 1:
+                    self.offset = self._offset_of(order.next())
+                self.save_state()
+                return self._current_track()
+            else:
+                if current_track:
+                    self._remove_current()
+                if self.size > 0:
+                    self.offset = self._offset_of(order.next())
+                    return self._current_track()
+                return "Queue is now empty."
+
+        else:
+            if self.repeat_ and current_track:
+                self.enqueue(current_track, save=False)
+            
+            self.dequeue()
+            
+            if self.size > 0:
+                self.offset = 0
+                self.save_state()
+                return self._current_track()
+            
+            return "Queue is now empty."
+
+    def prev(self):
+        """Move to previous track"""
+        if not self.repeat_:
+            return "Previous track is not available in FIFO mode. Tracks are removed after playing."
+        
+        if self.size == 0:
+            return "Queue is empty."
+        
+        if self.shuffle_:
+            self.offset = self._offset_of(self._shuffle_order().prev())
+        else:
+            self._squeeze()
+            self.offset = (self.offset - 1) % self.size
+        self.save_state()
+        return self._current_track()
+
+
+def new_queue(seed=SHUFFLE_SEED):
+    """Create a queue using the engine selected by QUEUE_ENGINE"""
+    return ArrayQueue(seed) if QUEUE_ENGINE == "array" else Queue(seed)
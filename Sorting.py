@@ -1,42 +1,79 @@
+import heapq
 
-def merge_sort(tracks, key):
-    if len(tracks) <= 1:
-        return tracks
+# Tie-break order used after the requested key
+SORT_ATTRIBUTES = ['title', 'artist', 'album', 'duration', 'id']
 
-    mid = len(tracks) // 2
-    left = merge_sort(tracks[:mid], key)
-    right = merge_sort(tracks[mid:], key)
+def normalize(value):
+    return value.lower() if isinstance(value, str) else value
 
-    return merge(left, right, key)
+def sort_key(key):
+    """
+    Return a function that builds one collation tuple per track:
+    the requested key first, then the remaining SORT_ATTRIBUTES in order,
+    with strings case-folded exactly as compare_tracks does.
+    """
+    others = [attribute for attribute in SORT_ATTRIBUTES if attribute != key]
 
-def merge(left, right, key):
-    sorted_tracks = []
+    def collate(track):
+        return (normalize(track[key]),) + tuple(normalize(track[attribute]) for attribute in others)
 
-    while left and right:
-        comparison = compare_tracks(left[0], right[0], key)
+    return collate
 
-        if comparison < 0:
-            sorted_tracks.append(left.pop(0))
-        elif comparison > 0:
-            sorted_tracks.append(right.pop(0))
-        else:
-            sorted_tracks.append(left.pop(0)) 
+def merge_sort(tracks, key):
+    # Keys are computed once per track and Python's stable sort does the rest,
+    # giving the same order the original merge sort produced
+    return sorted(tracks, key=sort_key(key))
 
-    sorted_tracks.extend(left)
-    sorted_tracks.extend(right)
+def compare_tracks(track1, track2, key):
+    collate = sort_key(key)
+    first, second = collate(track1), collate(track2)
+    return (first > second) - (first < second)
 
-    return sorted_tracks
+class LazySortedTracks:
+    """
+    Sequence view of merge_sort(tracks, key) that only orders the rows that
+    have been asked for. Tracks go into a heap (O(n)); each requested row is
+    one pop, so page 1 or 2 costs far less than a full sort. A request that
+    reaches deep into the list sorts whatever is left in one go.
+    Supports len(), indexing and slicing, so it can be handed to Pagination.
+    """
+    def __init__(self, tracks, key, full_sort_fraction=0.25):
+        collate = sort_key(key)
+        # The original position breaks full ties, keeping the sort stable
+        self._heap = [(collate(track), position, track) for position, track in enumerate(tracks)]
+        heapq.heapify(self._heap)
+        self._sorted = []
+        self._full_sort_fraction = full_sort_fraction
 
-def compare_tracks(track1, track2, key):
-    def normalize(value):
-        return value.lower() if isinstance(value, str) else value
+    def __len__(self):
+        return len(self._sorted) + len(self._heap)
+
+    def _ensure(self, count):
+        missing = min(count, len(self)) - len(self._sorted)
+        if missing <= 0:
+            return
+        if missing > len(self._heap) * self._full_sort_fraction:
+            self._heap.sort()
+            self._sorted.extend(track for _, _, track in self._heap)
+            self._heap = []
+        else:
+            for _ in range(missing):
+                self._sorted.append(heapq.heappop(self._heap)[2])
 
-    if normalize(track1[key]) != normalize(track2[key]):
-        return (normalize(track1[key]) > normalize(track2[key])) - (normalize(track1[key]) < normalize(track2[key]))
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            stop = len(self) if index.stop is None else index.stop
+            self._ensure(stop if stop >= 0 else len(self))
+            return self._sorted[index]
+        if index < 0:
+            index += len(self)
+        self._ensure(index + 1)
+        return self._sorted[index]
 
-    attributes = ['title', 'artist', 'album', 'duration', 'id']
-    for attribute in attributes:
-        if attribute != key and normalize(track1[attribute]) != normalize(track2[attribute]):
-            return (normalize(track1[attribute]) > normalize(track2[attribute])) - (normalize(track1[attribute]) < normalize(track2[attribute]))
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
 
-    return 0
+def lazy_sort(tracks, key):
+    """merge_sort order, computed page by page (see LazySortedTracks)"""
+    return LazySortedTracks(tracks, key)
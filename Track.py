@@ -1,18 +1,28 @@
-from Duration import checkformat
+import sys
+from Duration import checkformat, normalize_duration
 
 class Track:
+    """
+    A library track. Slotted, with the duration kept as integer seconds and
+    artist/album names interned, so a large library costs a fraction of the
+    memory of one dict per track. Reads like the dicts it replaces
+    (track["title"], track.get("album")); to_dict() gives the Storage.json shape.
+    """
+    __slots__ = ("id", "title", "artist", "featured_artist", "album", "duration")
+    FIELDS = __slots__
+
     def __init__(self, id, title, artist, album, duration, featured_artist=""):
         self.id = id
         self.title = title.strip() if title else ""
-        self.artist = artist.strip() if artist else ""
-        self.featured_artist = featured_artist.strip() if featured_artist else ""
-        self.album = album.strip() if album else ""
-        
+        self.artist = sys.intern(artist.strip()) if artist else ""
+        self.featured_artist = sys.intern(featured_artist.strip()) if featured_artist else ""
+        self.album = sys.intern(album.strip()) if album else ""
+
         # Validate duration before storing
         validated_duration = checkformat(duration)
         if validated_duration == "invalid" or validated_duration is None:
             raise ValueError(f"Invalid duration format: '{duration}'. Use mm:ss or seconds.")
-        self.duration = validated_duration
+        self.duration = int(validated_duration)
 
     def to_dict(self):
         return {
@@ -21,20 +31,72 @@ class Track:
             "artist": self.artist,
             "featured_artist": self.featured_artist,
             "album": self.album,
-            "duration": self.duration
+            "duration": str(self.duration)
         }
-    
+
     @classmethod
     def from_dict(cls, data):
         return cls(
-            data["id"], 
-            data["title"], 
-            data["artist"], 
-            data["album"], 
+            data["id"],
+            data["title"],
+            data["artist"],
+            data["album"],
             data["duration"],
             data.get("featured_artist", "")
         )
-    
+
+    @classmethod
+    def load(cls, data):
+        """
+        Like from_dict, but one bad stored record never stops a load: a bad
+        duration loads as 0 seconds, missing or non-text fields are coerced,
+        and an unusable id is left as None to be renumbered. Returns None
+        for a record that is not a dict at all.
+        """
+        try:
+            track = cls.from_dict(data)
+            if not isinstance(track.id, int) or isinstance(track.id, bool):
+                track.id = None
+            return track
+        except (ValueError, TypeError, KeyError, AttributeError):
+            pass
+        if not isinstance(data, dict):
+            print(f"Warning: Skipping malformed track record {data!r}.")
+            return None
+
+        print(f"Warning: Track '{data.get('title')}' has invalid fields; repairing it.")
+        def text(key):
+            value = data.get(key)
+            return "" if value is None or isinstance(value, (list, dict)) else str(value)
+        track_id = data.get("id")
+        if not isinstance(track_id, int) or isinstance(track_id, bool):
+            track_id = None
+        duration = str(max(0, normalize_duration(data.get("duration"))))
+        return cls(track_id, text("title"), text("artist"), text("album"), duration, text("featured_artist"))
+
+    # Mapping-style access so code written against track dicts keeps working
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        if isinstance(other, Track):
+            return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+        return NotImplemented
+
+    __hash__ = None
+
     def __str__(self):
         from Duration import sec_to_min
         feat = f" (ft. {self.featured_artist})" if self.featured_artist else ""
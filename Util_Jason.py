@@ -1,6 +1,37 @@
 import json
 import os
+import threading
 from datetime import datetime
+from Duration import normalize_duration
+from Index import LibraryIndex
+from JsonStream import JsonStream
+from Track import Track
+
+STORAGE_FILE = "Storage.json"
+JOURNAL_FILE = "Storage.journal"
+
+# "snapshot" rewrites Storage.json on every save.
+# "journal" appends one operation record per mutation to Storage.journal
+# and folds the log back into Storage.json every COMPACT_EVERY operations.
+# "sqlite" keeps the data in Storage.db (see Util_Sqlite) and applies each
+# operation as single-row inserts/deletes.
+STORAGE_MODE = os.environ.get("MUSIC_STORAGE_MODE", "snapshot")
+COMPACT_EVERY = 500
+
+# Snapshots at least this big are parsed record by record (see _stream_storage)
+STREAM_LOAD_BYTES = 4 * 1024 * 1024
+
+_journal_count = 0
+
+# Process-wide store shared by MusicLibrary, Playlist, Queue and main.
+# Disk is only re-read when the (inode, size, mtime) of the snapshot or
+# the journal changes.
+_cache = {"signature": None, "data": None, "index": None}
+
+# Thread still parsing the playlists of a streamed snapshot, if any, and
+# the data it fills in. If it fails, the error is kept with the signature
+# of the files it failed on, so the partial data is never saved.
+_loading = {"thread": None, "data": None, "error": None, "signature": None}
 
 def create_backup(filename):
     """Create a backup of the file before modifying it"""
@@ -25,10 +56,98 @@ def cleanup_old_backups(filename, keep=3):
     except Exception:
         pass
 
+def _file_signature():
+    """Identify the current on-disk state of the snapshot and the journal"""
+    if STORAGE_MODE == "sqlite":
+        from Util_Sqlite import DB_FILE
+        names = (DB_FILE,)
+    else:
+        names = (STORAGE_FILE, JOURNAL_FILE)
+
+    signature = []
+    for name in names:
+        try:
+            st = os.stat(name)
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def _remember(data):
+    """Make data the shared in-memory store for the current files"""
+    if data is not _cache["data"]:
+        _cache["index"] = None
+    _cache["data"] = data
+    _cache["signature"] = _file_signature()
+
+def invalidate():
+    """Force the next load() to re-read Storage.json from disk"""
+    _cache["data"] = None
+    _cache["signature"] = None
+    _cache["index"] = None
+
+def get_index(data=None):
+    """Return the LibraryIndex for data (the shared store by default)"""
+    if data is None:
+        data = load()
+    if data is not _cache["data"]:
+        return LibraryIndex(data)
+    if _cache["index"] is None:
+        _cache["index"] = LibraryIndex(data)
+    return _cache["index"]
+
+def _update_index(data, op):
+    """Keep the cached index in step with a change that is being saved"""
+    if data is _cache["data"] and _cache["index"] is not None:
+        if op is None:
+            _cache["index"] = None
+        else:
+            _cache["index"].apply(op)
+
+def next_track_id(data):
+    """Hand out the next ID from the persistent, never-reused track sequence"""
+    wait_for_playlists()
+    track_id = data.get("NextTrackId") or _first_free_id(data)
+    data["NextTrackId"] = track_id + 1
+    return track_id
+
+def _first_free_id(data):
+    return max((t.get("id", 0) for t in data.get("Tracks", [])), default=0) + 1
+
 def load():
-    """Load data from Storage.json with error handling"""
+    """Return the shared data store, re-reading disk only if the files changed"""
+    if _loading["thread"] is not None and not _loading["thread"].is_alive():
+        # Pick up the result of a finished background load before trusting the cache
+        wait_for_playlists()
+    if _cache["data"] is not None and _cache["signature"] == _file_signature():
+        return _cache["data"]
+    wait_for_playlists()
+    if STORAGE_MODE == "sqlite":
+        return _read_database()
+    return _read_storage()
+
+def _read_database():
+    """Load data from Storage.db"""
     try:
-        with open("Storage.json", 'r', encoding='utf-8') as file:
+        import Util_Sqlite
+        data = Util_Sqlite.load()
+        as_tracks(data)
+        _remember(data)
+        return data
+    except Exception as e:
+        print(f"Unexpected error loading database: {e}")
+        return {"Tracks": [], "Playlists": []}
+
+def _read_storage():
+    """Load data from Storage.json and replay any journaled operations"""
+    try:
+        if os.path.getsize(STORAGE_FILE) >= STREAM_LOAD_BYTES:
+            if _loading["error"] is not None and _loading["signature"] == _file_signature():
+                # Streaming already failed on these files
+                raise _loading["error"]
+            return _stream_storage()
+        
+        with open(STORAGE_FILE, 'r', encoding='utf-8') as file:
             data = json.load(file)
             
             # Validate structure
@@ -42,25 +161,152 @@ def load():
             if "Playlists" not in data:
                 data["Playlists"] = []
             
-            return data
+            if "NextTrackId" not in data:
+                data["NextTrackId"] = _first_free_id(data)
+            
+            as_tracks(data)
+            # Older files embed track dicts in playlists
+            migrate_playlists(data)
+            
+        _replay_journal(data)
+        _remember(data)
+        return data
             
     except FileNotFoundError:
-        print(f"File Storage.json not found. Creating new file.")
+        print(f"File {STORAGE_FILE} not found. Creating new file.")
         initial_data = {"Tracks": [], "Playlists": []}
+        _replay_journal(initial_data)
         save(initial_data)
         return initial_data
         
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        print("The file may be corrupted. Check Storage.json.backup files.")
-        return {"Tracks": [], "Playlists": []}
-    
     except Exception as e:
+        return _load_failed(e)
+
+def _load_failed(e):
+    """Report a Storage.json that could not be read; returns empty data"""
+    if isinstance(e, json.JSONDecodeError):
+        print(f"Error decoding JSON: {e}")
+        print(f"The file may be corrupted. Check {STORAGE_FILE}.backup files.")
+    else:
         print(f"Unexpected error loading data: {e}")
-        return {"Tracks": [], "Playlists": []}
+    return {"Tracks": [], "Playlists": []}
+
+def _stream_value(stream, key, data, index):
+    """Parse one top-level value of Storage.json, indexing records as they arrive"""
+    if key == "Tracks":
+        clashes = []
+        for entry in stream.items():
+            track = Track.load(entry)
+            if track is None:
+                continue
+            if track.id is None or track.id in index.by_id:
+                clashes.append(track)
+                continue
+            data["Tracks"].append(track)
+            index._add_track(track)
+        if clashes:
+            data["Tracks"].extend(clashes)
+            renumber_tracks(data)
+            for track in clashes:
+                index._add_track(track)
+    elif key == "Playlists":
+        resolve = _entry_resolver(data["Tracks"])
+        for playlist in stream.items():
+            for name, entries in playlist.items():
+                track_ids = [resolve(entry) for entry in entries]
+                index._new_playlist(name)
+                index._add_members(name, track_ids)
+                data["Playlists"].append({name: track_ids})
+    else:
+        data[key] = stream.value()
+
+def _stream_rest(stream, file, keys, key, data, index):
+    """Parse from key to the end of the file, then fill in NextTrackId"""
+    try:
+        while key is not None:
+            _stream_value(stream, key, data, index)
+            key = next(keys, None)
+        # A stored NextTrackId can be behind IDs handed out by renumber_tracks
+        data["NextTrackId"] = max(data.get("NextTrackId") or 0, _first_free_id(data))
+    finally:
+        file.close()
+
+def _load_playlists_in_background(*args):
+    try:
+        _stream_rest(*args)
+    except Exception as e:
+        # Reported by wait_for_playlists() on the main thread
+        _loading["error"] = e
+
+def _stream_storage():
+    """
+    Load a large Storage.json record by record instead of with json.load,
+    feeding each track and playlist straight into the index. Tracks are
+    ready on return. Playlists, which come after them in the file, keep
+    loading on a background thread unless a journal has to be replayed
+    on top; wait_for_playlists() blocks until they are done.
+    """
+    global _journal_count
+    data = {"Tracks": [], "Playlists": []}
+    index = LibraryIndex(data)
+    file = open(STORAGE_FILE, 'r', encoding='utf-8')
+    stream = JsonStream(file)
+    keys = stream.keys()
+    
+    try:
+        key = next(keys, None)
+        while key is not None and key != "Playlists":
+            _stream_value(stream, key, data, index)
+            key = next(keys, None)
+    except Exception:
+        file.close()
+        raise
+    
+    if key is not None and data["Tracks"] and not os.path.exists(JOURNAL_FILE):
+        _journal_count = 0
+        _loading.update(data=data, error=None, signature=_file_signature())
+        _loading["thread"] = threading.Thread(
+            target=_load_playlists_in_background,
+            args=(stream, file, keys, key, data, index), daemon=True)
+        _loading["thread"].start()
+    else:
+        _stream_rest(stream, file, keys, key, data, index)
+        _replay_journal(data)
+        if os.path.exists(JOURNAL_FILE):
+            # Replayed operations are not reflected in the streamed index
+            index = None
+    
+    _remember(data)
+    _cache["index"] = index
+    return data
 
-def save(data):
-    """Save data to Storage.json with backup and validation"""
+def wait_for_playlists():
+    """
+    Block until a snapshot's playlists have finished loading in the
+    background. Returns the error that stopped them, or None. On failure the
+    partly loaded data is dropped from the cache, so the next load() reports
+    the file as unreadable, and save() refuses to write it back.
+    """
+    thread = _loading["thread"]
+    if thread is not None:
+        thread.join()
+        _loading["thread"] = None
+        if _loading["error"] is not None:
+            _load_failed(_loading["error"])
+            if _cache["data"] is _loading["data"]:
+                invalidate()
+    return _loading["error"]
+
+def save(data, op=None):
+    """
+    Save data to Storage.json with backup and validation.
+    In journal mode, passing the operation record that produced the change
+    appends it to Storage.journal instead of rewriting the whole file.
+    """
+    global _journal_count
+    if wait_for_playlists() is not None and data is _loading["data"]:
+        print(f"Error: {STORAGE_FILE} did not load completely. Not saving over it.")
+        return False
     try:
         # Validate data structure before saving
         if not isinstance(data, dict):
@@ -71,14 +317,24 @@ def save(data):
             print("Error: Data missing required keys (Tracks, Playlists).")
             return False
         
-        # Create backup before saving
-        create_backup("Storage.json")
+        _update_index(data, op)
+        
+        if STORAGE_MODE == "sqlite":
+            import Util_Sqlite
+            if op is None or not Util_Sqlite.apply(op):
+                Util_Sqlite.save_all(data)
+            _remember(data)
+            return True
         
-        # Save with pretty formatting
-        with open("Storage.json", 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4, ensure_ascii=False)
+        if STORAGE_MODE == "journal" and op is not None:
+            append_journal(op, data.get("JournalGeneration", 0))
+            _journal_count += 1
+            if _journal_count >= COMPACT_EVERY:
+                return compact(data)
+            _remember(data)
+            return True
         
-        return True
+        return compact(data)
         
     except IOError as e:
         print(f"Error saving to file: {e}")
@@ -88,27 +344,239 @@ def save(data):
         print(f"Unexpected error saving data: {e}")
         return False
 
+def compact(data):
+    """Write a full snapshot of data to Storage.json and empty the journal"""
+    global _journal_count
+
+    # Create backup before saving
+    create_backup(STORAGE_FILE)
+
+    # Journals started before this snapshot are folded into it; if a crash
+    # leaves one behind, replay sees the older generation and discards it
+    data["JournalGeneration"] = data.get("JournalGeneration", 0) + 1
+
+    # Write to a temp file first so a crash never leaves a half-written snapshot
+    temp_name = f"{STORAGE_FILE}.tmp"
+    with open(temp_name, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=4, ensure_ascii=False, default=_encode)
+    os.replace(temp_name, STORAGE_FILE)
+
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
+    _journal_count = 0
+    _remember(data)
+    return True
+
+def append_journal(op, generation=0):
+    """
+    Append a single operation record to Storage.journal. A new journal
+    starts with a header naming the snapshot generation it builds on.
+    """
+    with open(JOURNAL_FILE, 'a', encoding='utf-8') as file:
+        if file.tell() == 0:
+            file.write(json.dumps({"op": "journal", "generation": generation}) + "\n")
+        file.write(json.dumps(op, ensure_ascii=False, default=_encode) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+def _replay_journal(data):
+    """
+    Apply every operation in Storage.journal to data, in order. A torn
+    final record is cut off the file, so the next append starts on a
+    clean line instead of being glued onto the fragment. A journal from an
+    older snapshot generation is already in the snapshot and is removed.
+    """
+    global _journal_count
+    _journal_count = 0
+    stale = False
+    try:
+        with open(JOURNAL_FILE, 'rb+') as file:
+            offset = 0
+            torn_at = None
+            last = b""
+            for line in file:
+                if line.strip():
+                    try:
+                        op = json.loads(line)
+                        if not isinstance(op, dict):
+                            raise ValueError("not an operation record")
+                    except ValueError:
+                        print(f"Warning: Ignoring incomplete record in {JOURNAL_FILE}.")
+                        torn_at = offset if torn_at is None else torn_at
+                    else:
+                        if op.get("op") != "journal":
+                            apply_op(data, op)
+                            _journal_count += 1
+                        elif op.get("generation", 0) < data.get("JournalGeneration", 0):
+                            # Already folded into the snapshot by a compaction
+                            # that crashed before removing the journal
+                            stale = True
+                            break
+                        torn_at = None
+                offset += len(line)
+                last = line
+
+            if torn_at is not None:
+                file.truncate(torn_at)
+            elif last and not last.endswith(b"\n"):
+                # A complete record whose newline never made it to disk
+                file.seek(0, os.SEEK_END)
+                file.write(b"\n")
+        if stale:
+            os.remove(JOURNAL_FILE)
+    except FileNotFoundError:
+        pass
+
+def _encode(value):
+    """json default hook: Track objects are written in the plain dict shape"""
+    if isinstance(value, Track):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def as_tracks(data):
+    """Replace the track dicts read from storage with compact Track objects"""
+    tracks = (track if isinstance(track, Track) else Track.load(track) for track in data.get("Tracks", []))
+    data["Tracks"] = [track for track in tracks if track is not None]
+
+def _playlist(data, name):
+    for playlist in data["Playlists"]:
+        if name in playlist:
+            return playlist[name]
+    return None
+
+def _track_id(entry):
+    """Playlist entries are track IDs; older files embedded whole track dicts"""
+    return entry.get("id") if isinstance(entry, dict) else entry
+
+def _record_key(entry):
+    """What identifies a track record when its stored id cannot be trusted"""
+    return (str(entry.get("title") or "").strip(), str(entry.get("artist") or "").strip(),
+            str(entry.get("album") or "").strip(), normalize_duration(entry.get("duration")))
+
+def _entry_resolver(tracks):
+    """
+    Map playlist entries to track IDs. Embedded track dicts from older files
+    are matched on their whole record, falling back to their stored id.
+    """
+    by_record = {}
+    def resolve(entry):
+        if not isinstance(entry, dict):
+            return entry
+        if not by_record:
+            for track in tracks:
+                by_record.setdefault(_record_key(track), track.id)
+        return by_record.get(_record_key(entry), entry.get("id"))
+    return resolve
+
+def renumber_tracks(data):
+    """
+    Give every track a unique ID. Older files could hand the same ID to two
+    tracks, and a repaired record may have none; the later ones get fresh
+    IDs from the sequence. Returns True if any track was renumbered.
+    """
+    seen = set()
+    clashes = []
+    for track in data.get("Tracks", []):
+        if track.id is None or track.id in seen:
+            clashes.append(track)
+        else:
+            seen.add(track.id)
+    if clashes:
+        next_id = max(data.get("NextTrackId") or 0, max(seen, default=0) + 1)
+        for track in clashes:
+            track.id = next_id
+            next_id += 1
+        data["NextTrackId"] = next_id
+        print(f"Warning: Gave {len(clashes)} track(s) with a duplicate or missing ID a new ID.")
+    return bool(clashes)
+
+def migrate_playlists(data):
+    """
+    Repair duplicate track IDs, then convert playlists that embed track
+    dicts to lists of track IDs
+    """
+    migrated = renumber_tracks(data)
+    resolve = _entry_resolver(data.get("Tracks", []))
+    for playlist in data.get("Playlists", []):
+        for name, entries in playlist.items():
+            if any(isinstance(entry, dict) for entry in entries):
+                playlist[name] = [resolve(entry) for entry in entries]
+                migrated = True
+    return migrated
+
+def resolve_tracks(data, track_ids):
+    """Turn a playlist's list of track IDs into track dicts"""
+    by_id = get_index(data).by_id
+    return [by_id[track_id] for track_id in track_ids if track_id in by_id]
+
+def apply_op(data, op):
+    """Apply one journal operation record to data"""
+    kind = op.get("op")
+
+    if kind in ("add_track", "add_tracks"):
+        for entry in op["tracks"] if kind == "add_tracks" else [op["track"]]:
+            track = Track.load(entry)
+            if track is not None and track.id is not None:
+                data["Tracks"].append(track)
+                data["NextTrackId"] = max(data.get("NextTrackId", 1), track.id + 1)
+
+    elif kind == "delete_track":
+        track = Track.load(op["track"])
+        if track is None:
+            return
+        if track in data["Tracks"]:
+            data["Tracks"].remove(track)
+        for playlist in data["Playlists"]:
+            for ids in playlist.values():
+                if track["id"] in ids:
+                    ids[:] = [i for i in ids if i != track["id"]]
+
+    elif kind == "create_playlist":
+        data["Playlists"].append({op["name"]: []})
+
+    elif kind == "delete_playlist":
+        data["Playlists"] = [p for p in data["Playlists"] if op["name"] not in p]
+
+    elif kind == "add_to_playlist":
+        ids = _playlist(data, op["name"])
+        if ids is not None:
+            ids.extend(_track_id(entry) for entry in op.get("ids", op.get("tracks", [])))
+
+    elif kind == "remove_from_playlist":
+        ids = _playlist(data, op["name"])
+        track_id = op["id"] if "id" in op else _track_id(op["track"])
+        if ids is not None and track_id in ids:
+            ids.remove(track_id)
+
+    else:
+        print(f"Warning: Unknown journal operation '{kind}' skipped.")
+
+QUEUE_FILE = "Queue_State.json"
+QUEUE_KEYS = ["current_index", "shuffle", "repeat", "playing"]
+
+def _has_queue_keys(queue_data):
+    # Current files list "track_ids"; older ones embed full "tracks"
+    return (all(key in queue_data for key in QUEUE_KEYS) and
+            ("track_ids" in queue_data or "tracks" in queue_data))
+
 def save_queue(queue_data):
-    """Save queue state to Queue_State.json"""
+    """Atomically save queue state to Queue_State.json"""
     try:
-        if queue_data is None:
-            # Clear queue file
-            with open("Queue_State.json", 'w', encoding='utf-8') as file:
-                json.dump(None, file)
-            return True
-        
-        # Validate queue data structure
-        if not isinstance(queue_data, dict):
-            print("Error: Invalid queue data structure.")
-            return False
-        
-        required_keys = ["tracks", "current_index", "shuffle", "repeat", "playing"]
-        if not all(key in queue_data for key in required_keys):
-            print("Error: Queue data missing required keys.")
-            return False
+        if queue_data is not None:
+            # Validate queue data structure
+            if not isinstance(queue_data, dict):
+                print("Error: Invalid queue data structure.")
+                return False
+            
+            if not _has_queue_keys(queue_data):
+                print("Error: Queue data missing required keys.")
+                return False
         
-        with open("Queue_State.json", 'w', encoding='utf-8') as file:
-            json.dump(queue_data, file, indent=4, ensure_ascii=False)
+        # None clears the queue file
+        temp_name = f"{QUEUE_FILE}.tmp"
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            json.dump(queue_data, file, separators=(",", ":"), ensure_ascii=False)
+        os.replace(temp_name, QUEUE_FILE)
         
         return True
         
@@ -119,7 +587,7 @@ def save_queue(queue_data):
 def load_queue():
     """Load queue state from Queue_State.json"""
     try:
-        with open("Queue_State.json", 'r', encoding='utf-8') as file:
+        with open(QUEUE_FILE, 'r', encoding='utf-8') as file:
             data = json.load(file)
             
             # None means empty queue
@@ -131,8 +599,7 @@ def load_queue():
                 print("Warning: Invalid queue state structure.")
                 return None
             
-            required_keys = ["tracks", "current_index", "shuffle", "repeat", "playing"]
-            if not all(key in data for key in required_keys):
+            if not _has_queue_keys(data):
                 print("Warning: Queue state missing required keys.")
                 return None
             
@@ -153,6 +620,7 @@ def load_queue():
 def verify_data_integrity():
     """Verify the integrity of Storage.json"""
     try:
+        wait_for_playlists()
         data = load()
         
         issues = []
@@ -162,18 +630,25 @@ def verify_data_integrity():
         if len(track_ids) != len(set(track_ids)):
             issues.append("Duplicate track IDs found")
         
-        # Check for tracks with invalid durations
+        # The ID sequence must never hand out an ID that is already taken
+        if track_ids and data.get("NextTrackId", 0) <= max((i for i in track_ids if isinstance(i, int)), default=0):
+            issues.append("Track ID sequence (NextTrackId) is behind existing track IDs")
+        
+        # Durations are whole seconds once loaded as Track objects
         for track in data.get("Tracks", []):
-            if track.get("duration") == "invalid" or track.get("duration") is None:
+            duration = track.get("duration")
+            if not isinstance(duration, int) or isinstance(duration, bool) or duration < 0:
                 issues.append(f"Track '{track.get('title')}' has invalid duration")
         
         # Check playlist references
-        all_track_ids = set(track_ids)
+        index = get_index(data)
         for playlist in data.get("Playlists", []):
-            for playlist_name, tracks in playlist.items():
-                for track in tracks:
-                    if track.get("id") not in all_track_ids:
-                        issues.append(f"Playlist '{playlist_name}' references non-existent track ID {track.get('id')}")
+            for playlist_name, ids in playlist.items():
+                for track_id in ids:
+                    if not isinstance(track_id, int):
+                        issues.append(f"Playlist '{playlist_name}' has a malformed entry {track_id!r} (expected a track ID)")
+                    elif track_id not in index:
+                        issues.append(f"Playlist '{playlist_name}' references non-existent track ID {track_id}")
         
         if issues:
             print("\n" + "!" * 60)
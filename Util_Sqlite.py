@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+
+DB_FILE = "Storage.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    pk INTEGER PRIMARY KEY,
+    id INTEGER,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    featured_artist TEXT NOT NULL DEFAULT '',
+    album TEXT NOT NULL DEFAULT '',
+    duration TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    artist_norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_id ON tracks(id);
+CREATE INDEX IF NOT EXISTS idx_tracks_title_artist ON tracks(title_norm, artist_norm);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks(artist_norm);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    pk INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_pk INTEGER NOT NULL REFERENCES playlists(pk) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    track_pk INTEGER NOT NULL REFERENCES tracks(pk) ON DELETE CASCADE,
+    PRIMARY KEY (playlist_pk, position)
+);
+CREATE INDEX IF NOT EXISTS idx_playlist_tracks_track ON playlist_tracks(track_pk);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+TRACK_COLUMNS = ("id", "title", "artist", "featured_artist", "album", "duration")
+
+_connection = None
+
+
+def _norm(value):
+    return (value or "").lower().strip()
+
+
+def connect():
+    """Open (and if needed create) the SQLite database"""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(DB_FILE)
+        _connection.execute("PRAGMA foreign_keys = ON")
+        _connection.executescript(SCHEMA)
+    return _connection
+
+
+def close():
+    """Close the shared connection"""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def _track_row(track):
+    return (
+        track.get("id"),
+        track.get("title", ""),
+        track.get("artist", ""),
+        track.get("featured_artist", ""),
+        track.get("album", ""),
+        str(track.get("duration", "0")),
+        _norm(track.get("title")),
+        _norm(track.get("artist")),
+    )
+
+
+def _track_pk_by_id(conn, track_id):
+    row = conn.execute("SELECT pk FROM tracks WHERE id = ? ORDER BY pk LIMIT 1", (track_id,)).fetchone()
+    return row[0] if row else None
+
+
+def _playlist_pk(conn, name):
+    row = conn.execute("SELECT pk FROM playlists WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def load():
+    """Build the Storage.json-shaped dict from the database"""
+    if not os.path.exists(DB_FILE) and os.path.exists("Storage.json"):
+        print(f"{DB_FILE} not found. Migrating Storage.json...")
+        migrate_from_json()
+
+    conn = connect()
+    tracks = []
+    by_pk = {}
+    for row in conn.execute(
+            "SELECT pk, id, title, artist, featured_artist, album, duration FROM tracks ORDER BY pk"):
+        track = dict(zip(TRACK_COLUMNS, row[1:]))
+        tracks.append(track)
+        by_pk[row[0]] = track
+
+    playlists = []
+    members = {}
+    for playlist_pk, name in conn.execute("SELECT pk, name FROM playlists ORDER BY pk"):
+        members[playlist_pk] = []
+        playlists.append({name: members[playlist_pk]})
+    for playlist_pk, track_pk in conn.execute(
+            "SELECT playlist_pk, track_pk FROM playlist_tracks ORDER BY playlist_pk, position"):
+        members[playlist_pk].append(by_pk[track_pk]["id"])
+
+    data = {"Tracks": tracks, "Playlists": playlists}
+    row = conn.execute("SELECT value FROM meta WHERE key = 'NextTrackId'").fetchone()
+    if row:
+        data["NextTrackId"] = row[0]
+    else:
+        # Older databases never recorded the sequence; start it past every ID
+        data["NextTrackId"] = _first_free_id(tracks)
+        with conn:
+            _set_next_track_id(conn, data["NextTrackId"])
+    return data
+
+
+def _first_free_id(tracks):
+    return max((track["id"] or 0 for track in tracks), default=0) + 1
+
+
+def _set_next_track_id(conn, next_id):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('NextTrackId', ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (next_id,))
+
+
+def save_all(data):
+    """Replace the whole database contents with data in one transaction"""
+    conn = connect()
+    with conn:
+        conn.execute("DELETE FROM playlist_tracks")
+        conn.execute("DELETE FROM playlists")
+        conn.execute("DELETE FROM tracks")
+        conn.execute("DELETE FROM meta")
+        _set_next_track_id(conn, max(data.get("NextTrackId") or 0, _first_free_id(data.get("Tracks", []))))
+
+        pks = {}
+        for track in data.get("Tracks", []):
+            cursor = conn.execute(
+                "INSERT INTO tracks (id, title, artist, featured_artist, album, duration, "
+                "title_norm, artist_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _track_row(track))
+            pks.setdefault(track.get("id"), cursor.lastrowid)
+
+        for playlist in data.get("Playlists", []):
+            for name, track_ids in playlist.items():
+                playlist_pk = conn.execute(
+                    "INSERT INTO playlists (name) VALUES (?)", (name,)).lastrowid
+                for position, track_id in enumerate(track_ids):
+                    track_pk = pks.get(track_id)
+                    if track_pk is not None:
+                        conn.execute(
+                            "INSERT INTO playlist_tracks (playlist_pk, position, track_pk) "
+                            "VALUES (?, ?, ?)", (playlist_pk, position, track_pk))
+    return True
+
+
+def apply(op):
+    """Apply one operation record as single-row inserts/deletes"""
+    conn = connect()
+    kind = op.get("op")
+
+    with conn:
+        if kind == "add_track":
+            conn.execute(
+                "INSERT INTO tracks (id, title, artist, featured_artist, album, duration, "
+                "title_norm, artist_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _track_row(op["track"]))
+            _set_next_track_id(conn, op["track"]["id"] + 1)
+
+        elif kind == "add_tracks":
+            if op["tracks"]:
+                conn.executemany(
+                    "INSERT INTO tracks (id, title, artist, featured_artist, album, duration, "
+                    "title_norm, artist_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_track_row(track) for track in op["tracks"]))
+                _set_next_track_id(conn, max(track["id"] for track in op["tracks"]) + 1)
+
+        elif kind == "delete_track":
+            track_pk = _track_pk_by_id(conn, op["track"]["id"])
+            if track_pk is not None:
+                conn.execute("DELETE FROM tracks WHERE pk = ?", (track_pk,))
+
+        elif kind == "create_playlist":
+            conn.execute("INSERT INTO playlists (name) VALUES (?)", (op["name"],))
+
+        elif kind == "delete_playlist":
+            conn.execute("DELETE FROM playlists WHERE name = ?", (op["name"],))
+
+        elif kind == "add_to_playlist":
+            playlist_pk = _playlist_pk(conn, op["name"])
+            if playlist_pk is None:
+                return False
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM playlist_tracks WHERE playlist_pk = ?",
+                (playlist_pk,)).fetchone()[0]
+            for track_id in op["ids"]:
+                track_pk = _track_pk_by_id(conn, track_id)
+                if track_pk is not None:
+                    position += 1
+                    conn.execute(
+                        "INSERT INTO playlist_tracks (playlist_pk, position, track_pk) "
+                        "VALUES (?, ?, ?)", (playlist_pk, position, track_pk))
+
+        elif kind == "remove_from_playlist":
+            playlist_pk = _playlist_pk(conn, op["name"])
+            track_pk = _track_pk_by_id(conn, op["id"])
+            conn.execute(
+                "DELETE FROM playlist_tracks WHERE playlist_pk = ? AND position = "
+                "(SELECT MIN(position) FROM playlist_tracks WHERE playlist_pk = ? AND track_pk = ?)",
+                (playlist_pk, playlist_pk, track_pk))
+
+        else:
+            print(f"Warning: Unknown operation '{kind}' not applied to {DB_FILE}.")
+            return False
+
+    return True
+
+
+def migrate_from_json(json_file="Storage.json"):
+    """One-shot migration of Storage.json (and any pending journal) into the database"""
+    from Util_Jason import as_tracks, migrate_playlists, _replay_journal
+
+    with open(json_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    data.setdefault("Tracks", [])
+    data.setdefault("Playlists", [])
+    # Store rows in the same normalized shape the app later deletes by
+    as_tracks(data)
+    migrate_playlists(data)
+    _replay_journal(data)
+
+    save_all(data)
+    print(f"Migrated {len(data['Tracks'])} track(s) and {len(data['Playlists'])} playlist(s) to {DB_FILE}.")
+    return data
+
+if __name__ == "__main__":
+    migrate_from_json()
@@ -4,23 +4,26 @@ from Track import Track
 from Library import MusicLibrary
 from Playlist import Playlist
 from Util_Jason import load, save
-from Duration import total_duration
-from Queues import Queue
-from Sorting import merge_sort
+from Queues import new_queue
+from Sorting import merge_sort, lazy_sort
 from Pagination import Pagination
 
 class main:
     def __init__(self):
         self.library = MusicLibrary()
         self.playlist = Playlist()
-        self.data = load()
-        self.queue = Queue()
+        self.queue = new_queue()
         
         if self.queue.load_state():
             print("\n" + "=" * 60)
             print("Previous queue session restored!".center(60))
             print("=" * 60)
 
+    @property
+    def data(self):
+        """Shared in-memory store; only re-read when Storage.json changes on disk"""
+        return load()
+
     @staticmethod
     def prompt(args: str) -> str:
         return input(args).lower()
@@ -80,7 +83,7 @@ class main:
                 print("This playlist has no tracks.")
                 return None
             
-            sorted_tracks = merge_sort(playlist_tracks, key="title")
+            sorted_tracks = lazy_sort(playlist_tracks, key="title")
             return self._paginated_track_selection(sorted_tracks, f"Select Track from '{playlist_name}'")
             
         except ValueError:
@@ -175,7 +178,7 @@ class main:
                 break
             elif choice == 'n':
                 result = self.queue.next()
-                if isinstance(result, dict):
+                if not isinstance(result, str):
                     print(f"\n▶ NOW PLAYING: {self.queue.current_play()}")
                 else:
                     print(f"\n{result}")
@@ -185,6 +188,9 @@ class main:
             elif choice == '1':
                 self._playback_settings()
 
+        # Leaving the player: write whatever the thresholds have held back
+        self.queue.flush_state()
+
     def _playback_settings(self):
         """Handle playback settings menu"""
         print("\nPlayback Options:")
@@ -250,6 +256,7 @@ class main:
                     print("\n✓ Queue cleared successfully!")
             
             elif choice == '0':
+                self.queue.flush_state()
                 break
 
     def _play_from_library(self):
@@ -259,22 +266,19 @@ class main:
             return
         
         try:
-            self.data = load()
-            tracks = self.data.get("Tracks", [])
+            sorted_tracks = self.library.getSortedTracks("title")
             
-            if not tracks:
+            if not sorted_tracks:
                 print("\nNo tracks in library. Add some tracks first!")
                 input("\nPress Enter to continue...")
                 return
             
-            sorted_tracks = merge_sort(tracks[:], "title")
-            
             # Clear and rebuild queue
             self.queue.clear_queue()
             self.queue.enqueue_playlist(sorted_tracks)
 
             self.banner("PLAYING FROM LIBRARY")
-            print(f"Total Duration: {total_duration(self.data, 'Tracks')}")
+            print(f"Total Duration: {self.library.getTotalDuration()}")
             print(f"Total Tracks: {len(sorted_tracks)}\n")
             print(f"▶ NOW PLAYING: {self.queue.current_play()}\n")
             
@@ -338,8 +342,7 @@ class main:
     def _playlist_manager_menu(self):
         """Handle playlist manager submenu"""
         while True:
-            # Reinitialize playlist object to get fresh data
-            self.playlist = Playlist()
+            self.playlist.updatePlaylistList()
             
             self.banner("PLAYLIST MANAGER")
             print("\nV → View All Playlists (Paginated)")
@@ -347,6 +350,7 @@ class main:
             print("A → Add Tracks to Playlist")
             print("R → Remove Track from Playlist")
             print("D → Delete Playlist")
+            print("X → Export Playlist")
             print("E → Exit to Main Menu")
             print("\nOr enter playlist number directly to view tracks")
 
@@ -368,6 +372,8 @@ class main:
                 self.playlist.deletePlaylist()
             elif choice == 'a':
                 self._add_track_to_playlist()
+            elif choice == 'x':
+                self._export_playlist()
             elif choice == 'e':
                 break
             else:
@@ -380,7 +386,7 @@ class main:
 
     def _remove_track_from_playlist(self):
         """Remove track from playlist helper"""
-        self.playlist = Playlist()
+        self.playlist.updatePlaylistList()
         
         print("\nSelect a playlist:")
         self.playlist.displayPlaylists()
@@ -394,9 +400,22 @@ class main:
         except ValueError:
             print("Invalid input.")
 
+    def _export_playlist(self):
+        """Export playlist helper"""
+        print("\nSelect a playlist:")
+        self.playlist.displayPlaylists()
+        try:
+            idx = int(input("Enter number: ")) - 1
+            if not 0 <= idx < len(self.playlist.list):
+                print("Invalid playlist.")
+                return
+            self.playlist.exportPlaylist(self.playlist.list[idx])
+        except ValueError:
+            print("Invalid input.")
+
     def _add_track_to_playlist(self):
         """Add track to playlist helper"""
-        self.playlist = Playlist()
+        self.playlist.updatePlaylistList()
         
         print("\nSelect a playlist:")
         self.playlist.displayPlaylists()
@@ -445,6 +464,12 @@ class main:
             return False
         
         matches = self.playlist.searchTrack(query)
+        if matches == []:
+            # Word-prefix search misses fragments inside words ("ana", "ing")
+            matches = self.playlist.searchTrack(query, mode="substring")
+        if matches == []:
+            print("No exact matches. Showing similar tracks...")
+            matches = self.playlist.searchTrack(query, mode="fuzzy")
         if matches is None:
             return True
         if not matches:
@@ -477,6 +502,8 @@ class main:
             print("  3 → Delete Track")
             print("  4 → Create Playlist")
             print("  5 → View All Playlists")
+            print("  6 → Import Tracks (CSV/JSONL)")
+            print("  7 → Export Library")
             print("  0 → Exit Program")
             print("-" * 45)
 
@@ -486,20 +513,26 @@ class main:
                 self._music_player_menu()
             elif choice == '1':
                 self.library.createTrack()
-                self.data = load()
             elif choice == '2':
                 self.banner("MUSIC LIBRARY")
-                print(f"Total Duration: {self.library.getTotalDuration()}\n")
+                shortest, longest = self.library.getDurationRange()
+                print(f"Total Duration: {self.library.getTotalDuration()} | Shortest: {shortest} | Longest: {longest}\n")
                 self.library.displayTracks()
             elif choice == '3':
                 self.banner("DELETE TRACK")
                 self.library.deleteTrack()
-                self.data = load()
             elif choice == '4':
                 self.playlist.createPlaylist()
             elif choice == '5':
                 self._playlist_manager_menu()
+            elif choice == '6':
+                self.banner("IMPORT TRACKS")
+                self.library.importTracks()
+            elif choice == '7':
+                self.banner("EXPORT LIBRARY")
+                self.library.exportTracks()
             elif choice == '0':
+                self.queue.flush_state()
                 print("\n" + "=" * 60)
                 print("Thanks for using Group 3's Music Player!".center(60))
                 print("Goodbye!".center(60))
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+import Util_Jason
+
+
+class ScratchTestCase(unittest.TestCase):
+    """Runs each test in an empty directory with a fresh shared store"""
+    storage_mode = "snapshot"
+
+    def setUp(self):
+        self.home = os.getcwd()
+        self.scratch = tempfile.TemporaryDirectory(prefix="music-test-")
+        os.chdir(self.scratch.name)
+        self.mode = Util_Jason.STORAGE_MODE
+        Util_Jason.STORAGE_MODE = self.storage_mode
+        Util_Jason.invalidate()
+
+    def tearDown(self):
+        Util_Jason.wait_for_playlists()
+        Util_Jason.invalidate()
+        Util_Jason.STORAGE_MODE = self.mode
+        if self.storage_mode == "sqlite":
+            import Util_Sqlite
+            Util_Sqlite.close()
+        os.chdir(self.home)
+        self.scratch.cleanup()
+
+    def reload(self):
+        """Drop the cached store and read it back from disk"""
+        Util_Jason.invalidate()
+        return Util_Jason.load()
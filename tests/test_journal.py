@@ -0,0 +1,83 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import Util_Jason
+from Track import Track
+from tests.support import ScratchTestCase
+
+
+def add_track(data, title):
+    track = Track(Util_Jason.next_track_id(data), title, "Artist", "Album", "3:00")
+    data["Tracks"].append(track)
+    Util_Jason.save(data, {"op": "add_track", "track": track})
+    return track
+
+
+class TornJournalTest(ScratchTestCase):
+    storage_mode = "journal"
+
+    def setUp(self):
+        super().setUp()
+        with redirect_stdout(StringIO()):
+            Util_Jason.save({"Tracks": [], "Playlists": []})
+
+    def test_appends_after_a_torn_record_survive_reload(self):
+        data = self.reload()
+        add_track(data, "One")
+        with open(Util_Jason.JOURNAL_FILE, 'a', encoding='utf-8') as file:
+            file.write('{"op": "add_track", "track": {"id": 9')
+
+        with redirect_stdout(StringIO()):
+            data = self.reload()
+            add_track(data, "Two")
+            titles = [track.title for track in self.reload()["Tracks"]]
+        self.assertEqual(titles, ["One", "Two"])
+
+    def test_record_missing_its_newline_is_kept(self):
+        data = self.reload()
+        add_track(data, "One")
+        with open(Util_Jason.JOURNAL_FILE, 'rb+') as file:
+            file.truncate(len(file.read()) - 1)
+
+        data = self.reload()
+        add_track(data, "Two")
+        titles = [track.title for track in self.reload()["Tracks"]]
+        self.assertEqual(titles, ["One", "Two"])
+
+
+class CompactionCrashTest(ScratchTestCase):
+    storage_mode = "journal"
+
+    def test_journal_left_by_a_crashed_compaction_is_not_replayed(self):
+        with redirect_stdout(StringIO()):
+            Util_Jason.save({"Tracks": [], "Playlists": []})
+        data = self.reload()
+        add_track(data, "One")
+        with open(Util_Jason.JOURNAL_FILE, 'rb') as file:
+            journal = file.read()
+
+        # Crash between replacing the snapshot and removing the journal
+        Util_Jason.compact(data)
+        with open(Util_Jason.JOURNAL_FILE, 'wb') as file:
+            file.write(journal)
+
+        data = self.reload()
+        self.assertEqual([track.title for track in data["Tracks"]], ["One"])
+        add_track(data, "Two")
+        self.assertEqual([track.title for track in self.reload()["Tracks"]], ["One", "Two"])
+        with redirect_stdout(StringIO()):
+            self.assertTrue(Util_Jason.verify_data_integrity())
+
+    def test_journal_without_a_header_still_replays(self):
+        with redirect_stdout(StringIO()):
+            Util_Jason.save({"Tracks": [], "Playlists": []})
+        track = Track(1, "Old", "Artist", "Album", "3:00")
+        with open(Util_Jason.JOURNAL_FILE, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({"op": "add_track", "track": track.to_dict()}) + "\n")
+        self.assertEqual([t.title for t in self.reload()["Tracks"]], ["Old"])
+
+
+if __name__ == "__main__":
+    unittest.main()
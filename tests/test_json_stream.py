@@ -0,0 +1,59 @@
+import io
+import json
+import unittest
+
+from JsonStream import JsonStream
+
+
+DOCUMENT = {
+    "Tracks": [
+        {"id": 1, "title": "Café \"Live\"", "duration": "3:00", "rating": 4.5},
+        {"id": 12345, "title": "Back\\slash", "duration": 1.5e3, "tags": []},
+        {"id": -7, "title": "☃ Snow", "duration": None, "nested": {"a": [1, {"b": True}]}},
+    ],
+    "Playlists": [{"P": [1, 12345]}, {"Empty": []}],
+    "NextTrackId": 12346,
+}
+
+
+def walk(text, chunk_size):
+    """Rebuild the document through the stream: arrays via items(), the rest via value()"""
+    stream = JsonStream(io.StringIO(text), chunk_size)
+    data = {}
+    for key in stream.keys():
+        data[key] = list(stream.items()) if isinstance(DOCUMENT.get(key), list) else stream.value()
+    return data
+
+
+class ChunkBoundaryTest(unittest.TestCase):
+    """Every chunk size must cut values somewhere; the result may not change"""
+
+    def test_compact_and_indented_documents(self):
+        for text in (json.dumps(DOCUMENT), json.dumps(DOCUMENT, indent=4)):
+            for chunk_size in range(1, 40):
+                self.assertEqual(walk(text, chunk_size), DOCUMENT, f"chunk {chunk_size}")
+
+    def test_numbers_split_across_chunks(self):
+        for number in ("123456789", "-0.25", "1.5e3", "2E-10"):
+            text = f"[{number}, {number}]"
+            for chunk_size in range(1, len(text) + 1):
+                stream = JsonStream(io.StringIO(text), chunk_size)
+                self.assertEqual(list(stream.items()), [json.loads(number)] * 2, f"{number} chunk {chunk_size}")
+
+    def test_top_level_number_at_end_of_file(self):
+        for chunk_size in range(1, 6):
+            self.assertEqual(JsonStream(io.StringIO("12345"), chunk_size).value(), 12345)
+
+    def test_empty_containers(self):
+        self.assertEqual(list(JsonStream(io.StringIO(" { } "), 1).keys()), [])
+        self.assertEqual(list(JsonStream(io.StringIO(" [ ] "), 1).items()), [])
+
+    def test_truncated_document_raises(self):
+        text = json.dumps(DOCUMENT)[:-20]
+        for chunk_size in (1, 7, 64):
+            with self.assertRaises(json.JSONDecodeError):
+                walk(text, chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
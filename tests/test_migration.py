@@ -0,0 +1,52 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import Util_Jason
+from tests.support import ScratchTestCase
+
+
+def record(track_id, title):
+    return {"id": track_id, "title": title, "artist": "Artist", "featured_artist": "",
+            "album": "Album", "duration": "180"}
+
+
+# Written by the original code, which numbered new tracks len(tracks) + 1
+LEGACY = {
+    "Tracks": [record(1, "A"), record(2, "B"), record(3, "C"), record(3, "D")],
+    "Playlists": [{"P": [record(3, "D"), record(1, "A")]}],
+}
+
+
+class DuplicateIdMigrationTest(ScratchTestCase):
+    def write(self, data):
+        with open(Util_Jason.STORAGE_FILE, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+
+    def check(self, data):
+        ids = [track.id for track in data["Tracks"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        Util_Jason.wait_for_playlists()
+        titles = [track.title for track in Util_Jason.resolve_tracks(data, data["Playlists"][0]["P"])]
+        self.assertEqual(titles, ["D", "A"])
+        self.assertGreater(data["NextTrackId"], max(ids))
+
+    def test_duplicate_ids_are_renumbered_and_playlists_keep_their_songs(self):
+        self.write(LEGACY)
+        with redirect_stdout(StringIO()):
+            self.check(self.reload())
+
+    def test_streamed_load_does_the_same(self):
+        self.write(LEGACY)
+        stream_bytes = Util_Jason.STREAM_LOAD_BYTES
+        Util_Jason.STREAM_LOAD_BYTES = 0
+        try:
+            with redirect_stdout(StringIO()):
+                self.check(self.reload())
+        finally:
+            Util_Jason.STREAM_LOAD_BYTES = stream_bytes
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import random
+import unittest
+
+from Queues import ArrayQueue, Queue
+from tests.support import ScratchTestCase
+
+
+def make_tracks(count, first=1):
+    return [{"id": i, "title": f"Song {i}", "artist": "Artist", "album": "", "duration": "180"}
+            for i in range(first, first + count)]
+
+
+class ShuffleRepeatTest(ScratchTestCase):
+    """Shuffle + repeat must never play the same track twice in a row"""
+
+    def play(self, engine, seed):
+        rng = random.Random(seed)
+        queue = engine(seed=seed)
+        queue.enqueue_playlist(make_tracks(rng.randint(3, 8)))
+        queue.shuffle_ = queue.repeat_ = True
+        issued = 100
+        try:
+            for _ in range(60):
+                action = rng.random()
+                if action < 0.5:
+                    before = queue._current_track()
+                    after = queue.next()
+                    if queue.size > 1:
+                        self.assertIsNot(after, before, f"{engine.__name__} seed {seed}")
+                elif action < 0.6:
+                    queue.prev()
+                elif action < 0.75 and queue.size > 2:
+                    start = rng.randrange(queue.size)
+                    queue.remove_range(start, start + rng.randint(1, 2))
+                elif action < 0.85 and queue.size > 2:
+                    rng.choice((queue.dequeue, queue.remove_current))()
+                else:
+                    count = rng.randint(1, 3)
+                    queue.insert_many(rng.randint(0, queue.size), make_tracks(count, issued))
+                    issued += count
+        finally:
+            queue.writer.discard()
+
+    def test_linked_queue(self):
+        for seed in range(200):
+            self.play(Queue, seed)
+
+    def test_array_queue(self):
+        for seed in range(200):
+            self.play(ArrayQueue, seed)
+
+    def test_removing_the_front_twice(self):
+        for engine in (Queue, ArrayQueue):
+            for seed in range(50):
+                queue = engine(seed=seed)
+                queue.enqueue_playlist(make_tracks(5))
+                queue.shuffle_ = queue.repeat_ = True
+                queue.next()
+                queue.remove_range(0, 1)
+                queue.remove_range(0, 1)
+                playing = queue._current_track()
+                self.assertIsNot(queue.next(), playing)
+                queue.writer.discard()
+
+
+def contents(queue):
+    return [(track["id"], is_current) for track, is_current in queue._ordered()]
+
+
+class ArrayQueueTest(ScratchTestCase):
+    """ArrayQueue must track Queue entry for entry, holes and all"""
+
+    def edit(self, queue, rng, issued):
+        action = rng.random()
+        if action < 0.4:
+            queue.next()
+        elif action < 0.5:
+            queue.prev()
+        elif action < 0.6:
+            queue.remove_current()
+        elif action < 0.65:
+            queue.dequeue()
+        elif action < 0.75 and queue.size:
+            start = rng.randrange(queue.size)
+            queue.remove_range(start, start + rng.randint(1, 3))
+        elif action < 0.85 and queue.size:
+            start = rng.randrange(queue.size)
+            queue.move_range(start, start + rng.randint(1, 3), rng.randrange(queue.size))
+        else:
+            # Repeated IDs on purpose: the same track can be queued twice
+            queue.insert_many(rng.randint(0, queue.size), make_tracks(rng.randint(1, 3), issued % 40))
+
+    def check(self, queue):
+        entries = contents(queue)
+        self.assertEqual(len(entries), queue.size)
+        if queue.size:
+            self.assertEqual(sum(is_current for _, is_current in entries), 1)
+        ids = [track_id for track_id, _ in entries]
+        self.assertEqual(set(queue.tracks), set(ids))
+        self.assertEqual(sum(queue.uses.values()), len(ids))
+
+    def test_matches_linked_queue_without_shuffle(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            queues = [Queue(seed=seed), ArrayQueue(seed=seed)]
+            tracks = make_tracks(rng.randint(1, 30))
+            for queue in queues:
+                queue.enqueue_playlist(tracks)
+                queue.repeat_ = seed % 2 == 1
+            for step in range(150):
+                state = rng.getstate()
+                for queue in queues:
+                    rng.setstate(state)
+                    self.edit(queue, rng, step)
+                self.assertEqual(contents(queues[1]), contents(queues[0]), f"seed {seed} step {step}")
+                self.check(queues[1])
+            for queue in queues:
+                queue.writer.discard()
+
+    def test_shuffle_keeps_the_window_consistent(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            queue = ArrayQueue(seed=seed)
+            queue.enqueue_playlist(make_tracks(rng.randint(1, 30)))
+            queue.shuffle_, queue.repeat_ = True, seed % 2 == 1
+            for step in range(150):
+                self.edit(queue, rng, step)
+                self.check(queue)
+            queue.writer.discard()
+
+    def test_enqueue_playlist_accepts_a_generator(self):
+        queue = ArrayQueue()
+        queue.enqueue_playlist(track for track in make_tracks(3))
+        self.assertEqual(contents(queue), [(1, True), (2, False), (3, False)])
+        queue.writer.discard()
+
+    def test_removed_tracks_are_forgotten(self):
+        queue = ArrayQueue()
+        queue.enqueue_playlist(make_tracks(4) + make_tracks(1))
+        queue.next()
+        queue.remove_range(0, 3)
+        self.assertEqual(set(queue.tracks), {1})
+        queue.dequeue()
+        self.assertEqual(queue.tracks, {})
+        queue.writer.discard()
+
+
+if __name__ == "__main__":
+    unittest.main()
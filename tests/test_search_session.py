@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from Index import LibraryIndex, SearchSession, _substring_match
+
+
+WORDS = ["love", "lover", "night", "nightfall", "blue", "blues", "tay", "taylor", "ghost", "go"]
+
+
+def make_track(rng, track_id):
+    words = lambda count: " ".join(rng.choice(WORDS).title() for _ in range(count))
+    return {"id": track_id, "title": words(2), "artist": words(1), "featured_artist": "",
+            "album": words(rng.randint(0, 2)), "duration": "180"}
+
+
+def expected(index, mode, query):
+    """What a search without any cached results returns"""
+    if mode == "substring":
+        query = query.lower()
+        return [track["id"] for track in index.data["Tracks"] if _substring_match(query, track)]
+    return index.search_ids(query)
+
+
+class NarrowingTest(unittest.TestCase):
+    """A narrowed search must return exactly what a full search would"""
+
+    def typed(self, rng):
+        """The prefixes of a query as typed, with the odd backspace"""
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 2)))
+        typed, query = [], ""
+        for char in text:
+            query += char.upper() if rng.random() < 0.2 else char
+            typed.append(query)
+            if rng.random() < 0.15:
+                query = query[:-1]
+                typed.append(query)
+        return typed
+
+    def check(self, mode, edits):
+        for seed in range(30):
+            rng = random.Random(seed)
+            data = {"Tracks": [make_track(rng, i) for i in range(1, 80)], "Playlists": []}
+            index = LibraryIndex(data)
+            session = SearchSession(index, mode, size=4)
+            next_id = 80
+            for _ in range(5):
+                for query in self.typed(rng):
+                    self.assertEqual(session.search_ids(query), expected(index, mode, query),
+                                     f"{mode} seed {seed} {query!r}")
+                    if edits and rng.random() < 0.1:
+                        if rng.random() < 0.5:
+                            track = make_track(rng, next_id)
+                            next_id += 1
+                            data["Tracks"].append(track)
+                            index.apply({"op": "add_track", "track": track})
+                        else:
+                            track = data["Tracks"].pop(rng.randrange(len(data["Tracks"])))
+                            index.apply({"op": "delete_track", "track": track})
+
+    def test_token_mode(self):
+        self.check("tokens", edits=False)
+
+    def test_substring_mode(self):
+        self.check("substring", edits=False)
+
+    def test_library_changes_while_typing(self):
+        for mode in ("tokens", "substring"):
+            self.check(mode, edits=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import Util_Jason
+import Util_Sqlite
+from Library import MusicLibrary
+from Track import Track
+from tests.support import ScratchTestCase
+
+
+LEGACY = {
+    "Tracks": [
+        {"id": 1, "title": "Song ", "artist": "Artist", "featured_artist": "", "album": "Album", "duration": "3:00"},
+        {"id": 2, "title": "Other", "artist": "Artist", "featured_artist": "", "album": "", "duration": "invalid"},
+        {"id": 3, "title": "Last", "artist": "Artist", "featured_artist": "", "album": "", "duration": "200"},
+    ],
+    "Playlists": [{"P": [1, 2, 3]}],
+}
+
+
+class SqliteMigrationTest(ScratchTestCase):
+    storage_mode = "sqlite"
+
+    def setUp(self):
+        super().setUp()
+        with open(Util_Jason.STORAGE_FILE, 'w', encoding='utf-8') as file:
+            json.dump(LEGACY, file)
+        with redirect_stdout(StringIO()):
+            self.data = Util_Jason.load()
+
+    def restart(self):
+        Util_Sqlite.close()
+        return self.reload()
+
+    def test_deleting_a_legacy_row_survives_a_restart(self):
+        library = MusicLibrary()
+        for track in list(self.data["Tracks"][:2]):
+            library.removeTrack(track)
+        data = self.restart()
+        self.assertEqual([track.title for track in data["Tracks"]], ["Last"])
+        self.assertEqual(data["Playlists"], [{"P": [3]}])
+
+    def test_deleted_highest_id_is_not_reused(self):
+        MusicLibrary().removeTrack(self.data["Tracks"][-1])
+        data = self.restart()
+        track = Track(Util_Jason.next_track_id(data), "New", "Artist", "", "1:00")
+        self.assertEqual(track.id, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import Util_Jason
+from Track import Track
+from tests.support import ScratchTestCase
+
+
+class TrackLoadTest(unittest.TestCase):
+    def load(self, record):
+        with redirect_stdout(StringIO()):
+            return Track.load(record)
+
+    def test_bad_duration_loads_as_zero(self):
+        track = self.load({"id": 1, "title": "A", "artist": "B", "album": "", "duration": "invalid"})
+        self.assertEqual((track.id, track.duration), (1, 0))
+
+    def test_non_text_fields_are_coerced(self):
+        track = self.load({"id": 2, "title": 1999, "artist": "Prince", "duration": "6:19"})
+        self.assertEqual((track.title, track.album, track.duration), ("1999", "", 379))
+
+    def test_unusable_id_is_left_for_renumbering(self):
+        self.assertIsNone(self.load({"id": "x", "title": "A", "artist": "B", "album": "", "duration": "1"}).id)
+
+    def test_non_dict_record_is_skipped(self):
+        self.assertIsNone(self.load(["not", "a", "track"]))
+
+
+class BadRecordLoadTest(ScratchTestCase):
+    def test_one_bad_record_does_not_empty_the_library(self):
+        with open(Util_Jason.STORAGE_FILE, 'w', encoding='utf-8') as file:
+            json.dump({"Tracks": [
+                {"id": 1, "title": "Good", "artist": "A", "album": "", "duration": "180"},
+                {"id": 2, "title": 1999, "artist": "Prince"},
+            ], "Playlists": []}, file)
+        with redirect_stdout(StringIO()):
+            data = self.reload()
+        self.assertEqual([track.title for track in data["Tracks"]], ["Good", "1999"])
+
+
+if __name__ == "__main__":
+    unittest.main()